@@ -1,65 +1,125 @@
 import os
+import json
+import math
 import streamlit as st
 import requests
-import folium
-from streamlit_folium import st_folium
-from shapely import wkt
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pydeck as pdk
 from dotenv import load_dotenv
 
 load_dotenv()
 
 API_URL = os.getenv("BACKEND_API_URL")
 
+@st.cache_resource
+def get_http_session():
+    """Create a pooled HTTP session shared across reruns for backend requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
 st.title("SDI-Search")
 st.markdown('''Searching the :blue-background[European Data Portal (EDP)] using natural language.''')
 
-def render_datasets(datasets):
-    """Render dataset information in expanders."""
+@st.cache_data(max_entries=512)
+def parse_extent(extent_wkt: str):
+    """Parse a WKT extent once and return its geometry type, GeoJSON mapping and bounds."""
+    # shapely is only needed once a user opens a map, so keep it off the initial page load
+    from shapely import wkt
+
+    geom = wkt.loads(extent_wkt)
+    return geom.geom_type, geom.__geo_interface__, geom.bounds
+
+def fit_zoom(bounds) -> float:
+    """Approximate the map zoom level that fits the given (minx, miny, maxx, maxy) bounds."""
+    minx, miny, maxx, maxy = bounds
+    span = max(maxx - minx, maxy - miny)
+    if span <= 0:
+        return 14
+    return max(0, min(14, math.log2(360 / span)))
+
+@st.cache_data(max_entries=1024)
+def prepare_dataset_view(dataset_json: str) -> dict:
+    """Derive the display strings for a dataset; keyed on its canonical JSON so it can be cached."""
+    metadata = json.loads(dataset_json).get("metadata") or {}
+    return {
+        "title": metadata.get("title"),
+        "description": metadata.get("description"),
+        "keywords": ", ".join(metadata.get("keywords") or []),
+        "access_urls": "\n".join(metadata.get("access_urls") or []),
+        "spatial_extent": metadata.get("spatial_extent"),
+        "spatial_extent_geojson": metadata.get("spatial_extent_geojson"),
+        "spatial_extent_bounds": metadata.get("spatial_extent_bounds"),
+    }
+
+def render_datasets(datasets, message_idx):
+    """Render dataset information in expanders. message_idx keeps widget keys stable across reruns."""
     if datasets:
         st.subheader("📊 Relevant Datasets")
         for i, dataset in enumerate(datasets, 1):
             if dataset.get('metadata'):
-                metadata = dataset["metadata"]
-                with st.expander(metadata.get("title", "Unknown Title")):
-                    if metadata.get("title"):
-                        st.write(f"**Title**: {metadata['title']}")
-                    if metadata.get('description'):
-                        st.write(f"**Description**: {metadata['description']}")
-                    if metadata.get("keywords"):
+                view = prepare_dataset_view(json.dumps(dataset, sort_keys=True))
+                with st.expander(view["title"] or "Unknown Title"):
+                    if view["title"]:
+                        st.write(f"**Title**: {view['title']}")
+                    if view["description"]:
+                        st.write(f"**Description**: {view['description']}")
+                    if view["keywords"]:
                         st.write("**Keywords:**")
-                        st.write(", ".join(metadata["keywords"]))
-                    if metadata.get("access_urls"):
+                        st.write(view["keywords"])
+                    if view["access_urls"]:
                         st.write("**Access URLs:**")
-                        st.write("\n".join(metadata["access_urls"]))
+                        st.write(view["access_urls"])
 
-                    # create a map that shows the dataset's extent
-                    m = folium.Map(location=[51.9607, 7.62], zoom_start=14)
+                    # create a map that shows the dataset's extent, only once the user asks for it
+                    dataset_key = f"{message_idx}-{dataset.get('dataset_id', str(i))}"
+                    if not st.toggle("Show map", key=f"showmap-{dataset_key}", value=False):
+                        continue
 
-                    extent_wkt = metadata.get("spatial_extent")
-                    if extent_wkt:
+                    layers = []
+                    view_state = pdk.ViewState(latitude=51.9607, longitude=7.62, zoom=14)
+
+                    # extents are precomputed as GeoJSON at harvest time
+                    geojson = view["spatial_extent_geojson"]
+                    bounds = view["spatial_extent_bounds"]
+                    extent_wkt = view["spatial_extent"]
+                    if not geojson and extent_wkt:
+                        # datasets indexed before the precomputation only carry the WKT
                         try:
-                            geom = wkt.loads(extent_wkt)
-                            if geom.geom_type == 'Polygon':
-                                geojson_data = folium.GeoJson(
-                                    data=geom.__geo_interface__,
-                                    style_function=lambda x: {
-                                        "color": "blue",
-                                        "fillColor": "blue",
-                                        "fillOpacity": 0.2,
-                                        "weight": 2
-                                    }
-                                )
-                                geojson_data.add_to(m)
-
-                                # Zoom to the bounds of the polygon
-                                minx, miny, maxx, maxy = geom.bounds
-                                m.fit_bounds([[miny, minx], [maxy, maxx]])
-                                
+                            _, geojson, bounds = parse_extent(extent_wkt)
                         except Exception as e:
                             st.warning(f"Could not parse the spatial extent: {e}")
-                             
-                    st_folium(m, width=725, returned_objects=[], key=f"map-{i}-{dataset.get('dataset_id', str(i))}-{datetime.now().isoformat()}")
+
+                    if geojson and geojson.get("type") == 'Polygon':
+                        layers.append(pdk.Layer(
+                            "PolygonLayer",
+                            data=[{"polygon": [list(coord) for coord in geojson["coordinates"][0]]}],
+                            get_polygon="polygon",
+                            get_fill_color=[0, 0, 255, 50],
+                            get_line_color=[0, 0, 255],
+                            line_width_min_pixels=2
+                        ))
+
+                        # Center and zoom to the bounds of the polygon
+                        minx, miny, maxx, maxy = bounds
+                        view_state = pdk.ViewState(
+                            latitude=(miny + maxy) / 2,
+                            longitude=(minx + maxx) / 2,
+                            zoom=fit_zoom(bounds)
+                        )
+
+                    st.pydeck_chart(
+                        pdk.Deck(layers=layers, initial_view_state=view_state, map_style="light"),
+                        key=f"map-{dataset_key}"
+                    )
     else:
         st.info("No datasets found for this query")
 
@@ -68,13 +128,13 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 
 # display messages from history on app rerun
-for message in st.session_state.messages:
+for message_idx, message in enumerate(st.session_state.messages):
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
     # Display datasets from the API response - only for assistant messages
     if message["role"] == "assistant":
-        render_datasets(message.get("datasets", []))
+        render_datasets(message.get("datasets", []), message_idx)
 
 # accept user prompt
 if prompt := st.chat_input("What data are you looking for?"):
@@ -88,10 +148,10 @@ if prompt := st.chat_input("What data are you looking for?"):
     # fetch the response from the backend
     with st.spinner("Searching for datasets..."):
         try:
-            response = requests.post(
+            response = get_http_session().post(
                 API_URL,
                 json={"query": prompt, "max_results": 5},
-                headers={"Content-Type": "application/json"}
+                timeout=(3, 30)
             )
             
             if response.status_code == 200:
@@ -100,7 +160,7 @@ if prompt := st.chat_input("What data are you looking for?"):
                 #display assistant response and datasets in chat message container
                 with st.chat_message("assistant"):
                     st.markdown(result["answer"])
-                    render_datasets(result.get("source_datasets", []))
+                    render_datasets(result.get("source_datasets", []), len(st.session_state.messages))
 
                 st.session_state.messages.append({
                     "role": "assistant",
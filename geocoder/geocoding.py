@@ -1,11 +1,15 @@
-from typing import Optional, Dict, Optional
+from typing import Optional, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from geopy.geocoders import Nominatim
+from geopy.extra.rate_limiter import RateLimiter
 from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 import logging
+import random
+import time
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BoundingBox:
     "Represents a geographic bounding box"
     north: float
@@ -14,13 +18,13 @@ class BoundingBox:
     west: float
 
     def __post_init__(self):
-        """Validate the bounding box coordinates"""
-        if not (-90 <= self.north <= 90 and -90 <= self.south <= 90):
-            raise ValueError("Latitude must be between -90 and 90 degrees.")
-        if not (-180 <= self.east <= 180 and -180 <= self.west <= 180):
-            raise ValueError("Longitude must be between -180 and 180 degrees.")
-        if self.south > self.north:
-            raise ValueError("South latitude must be less than North latitude.")
+        """Validate the bounding box coordinates in a single combined check"""
+        north, south, east, west = self.north, self.south, self.east, self.west
+        if not (-90 <= south <= north <= 90 and -180 <= east <= 180 and -180 <= west <= 180):
+            raise ValueError(
+                "Invalid bounding box: latitudes must be between -90 and 90 degrees with south <= north, "
+                f"longitudes between -180 and 180 degrees (got north={north}, south={south}, east={east}, west={west})."
+            )
 
     def to_dict(self) -> Dict[str, float]:
         """Convert the bounding box to a dictionary"""
@@ -33,27 +37,38 @@ class GeocodingService:
     def __init__(self, user_agent: str = "spatial_data_search_app", timeout: int = 3):
         """Initialize the geocoding service with a user agent and timeout"""
         self.geocoder = Nominatim(user_agent=user_agent, timeout=timeout)
+        # Nominatim allows at most 1 request per second; only cache misses reach the rate limiter
+        self._geocode = RateLimiter(self.geocoder.geocode, min_delay_seconds=1, max_retries=0, swallow_exceptions=False)
+        self._cached_bbox = lru_cache(maxsize=4096)(self._lookup_bbox)
         self.logger = logging.getLogger(__name__)
 
-    def get_bounding_box(self, location_query: str, retry_attempts: int = 3) -> Optional[BoundingBox]:
-        """Get the bounding box from a given location query"""
+    def _lookup_bbox(self, location_query: str) -> Optional[Tuple[float, float, float, float]]:
+        """Geocode a location and return its bounding box as a (south, north, west, east) tuple"""
+        location = self._geocode(location_query, exactly_one=True)
+        if location and location.raw.get('boundingbox'):
+            bbox = location.raw['boundingbox']
+            return float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])
+        return None
+
+    def get_bounding_box(self, location_query: str, retry_attempts: int = 3, backoff_base: float = 0.5) -> Optional[BoundingBox]:
+        """
+        Get the bounding box from a given location query, retrying service errors with exponential backoff.
+        Returns None when the location is not found; the service error is re-raised once the retries are exhausted,
+        so an outage is not mistaken for an unknown location.
+        """
         for attempt in range(retry_attempts):
             try:
-                location = self.geocoder.geocode(location_query, exactly_one=True)
-                if location and location.raw.get('boundingbox'):
-                    bbox = location.raw['boundingbox']
-                    return BoundingBox(
-                        south=float(bbox[0]),
-                        north=float(bbox[1]),
-                        west=float(bbox[2]),
-                        east=float(bbox[3])
-                    )
+                bbox = self._cached_bbox(location_query)
+                if bbox:
+                    south, north, west, east = bbox
+                    return BoundingBox(south=south, north=north, west=west, east=east)
                 else:
                     self.logger.warning(f"No bounding box found for location: {location_query}")
                     return None
             except (GeocoderTimedOut, GeocoderServiceError) as e:
-                self.logger.error(f"Geocoding service error: {e}. Retrying {attempt + 1}/{retry_attempts}...")
                 if attempt == retry_attempts - 1:
-                    self.logger.error("Max retry attempts reached. Could not retrieve bounding box.")
-                    return None
+                    self.logger.error(f"Geocoding service error: {e}. Max retry attempts reached. Could not retrieve bounding box.")
+                    raise
+                self.logger.error(f"Geocoding service error: {e}. Retrying {attempt + 1}/{retry_attempts}...")
+                time.sleep(backoff_base * (2 ** attempt) + random.uniform(0, 0.25))
         return None
\ No newline at end of file
@@ -1,8 +1,14 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from contextlib import asynccontextmanager
+from threading import Lock
+from cachetools import TTLCache
+import orjson
 import logging
 from services.orchestrator import RAGOrchestrator
 
@@ -19,24 +25,39 @@ class QueryResponse(BaseModel):
     source_datasets: List[Dict[str, Any]]
 
 
-rag_orchestrator = RAGOrchestrator()
+# created in the lifespan handler so importing this module does not build the RAG services
+_rag_orchestrator: Optional[RAGOrchestrator] = None
+
+def get_orchestrator() -> RAGOrchestrator:
+    """Return the process-wide orchestrator, which is set up on application startup"""
+    if _rag_orchestrator is None:
+        raise RuntimeError("RAG orchestrator is not initialized")
+    return _rag_orchestrator
+
+# recent search responses keyed by (query, max_results), shared across worker threads
+search_cache = TTLCache(maxsize=256, ttl=600)
+search_cache_lock = Lock()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # initialize the services once on application startup
+    # initialize the services once on application startup, off the event loop
+    global _rag_orchestrator
     try:
-        rag_orchestrator.initialize()
-        logger.info("RAG services initialized successfully")
-        yield
+        orchestrator = RAGOrchestrator()
+        await run_in_threadpool(orchestrator.initialize)
     except Exception as e:
+        # fail startup instead of serving requests with broken services
         logger.error(f"Failed to initialize RAG services: {e}")
-    finally:
-        pass
+        raise
+    _rag_orchestrator = orchestrator
+    logger.info("RAG services initialized successfully")
+    yield
 
 app = FastAPI(
         title='Spatial Data Search',
         description='Natural language search for spatial datasets using RAG',
-        lifespan=lifespan
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse
     )
 
 # configure cors middleware
@@ -48,17 +69,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# compress the dataset-heavy search responses
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 @app.post("/search", response_model=QueryResponse)
-def search_datasets(request: QueryRequest):
+async def search_datasets(request: QueryRequest):
     """Search for datasets using natural language query"""
+    cache_key = (request.query, request.max_results)
+    with search_cache_lock:
+        cached_response = search_cache.get(cache_key)
+    if cached_response is not None:
+        logger.info(f"Returning cached response for query: {request.query}")
+        return cached_response
+
     try:
-        result = rag_orchestrator.process_query(
+        # the async pipeline awaits network calls instead of pinning a worker thread per request
+        result = await get_orchestrator().aprocess_query(
             user_query=request.query,
             max_results=request.max_results
         )
-        return QueryResponse(
+        response = QueryResponse(
             answer=result.get("answer", ''),
             source_datasets=result.get("source_datasets", [])
         )
+        # failed searches and fallback answers are flagged by the orchestrator and not cached
+        if not result.get("fallback"):
+            with search_cache_lock:
+                search_cache[cache_key] = response
+        return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Search failed: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Search failed: {e}")
+
+@app.post("/search/stream")
+async def stream_search_datasets(request: QueryRequest):
+    """
+    Search for datasets and stream the answer as server-sent events: a "token" event per answer chunk
+    as soon as the LLM produces it, followed by one "sources" event with the source datasets
+    """
+    orchestrator = get_orchestrator()
+
+    async def events():
+        async for event, data in orchestrator.astream_query(user_query=request.query, max_results=request.max_results):
+            yield f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+    # text/event-stream responses are passed through the gzip middleware uncompressed, so chunks are not buffered
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
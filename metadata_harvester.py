@@ -1,14 +1,26 @@
 ## Script for harvesting metadata from the local DCAT metadata XML file and the data.europa.eu platform and populating the vector and spatial index
 ## Run it only once when initializing the application
 
+import asyncio
+import copy
 import logging
+import multiprocessing
+import queue
+import threading
+import httpx
 import requests
-from typing import List
-from rdflib import Graph, Namespace, URIRef, Literal, RDF
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Any, Optional, Iterator
+from pyld import jsonld
 
 from models.dataset import Dataset
 from parsers.rdf_parser import RDFParser
 from vector_stores.qdrant_store import QdrantVectorStoreManager
+from vector_stores.response_cache import QdrantResponseCache
 from pg_database.postgis_db import PostGISService
 
 # Configuration
@@ -27,16 +39,72 @@ CATALOGUES = [
     # }
 ]
 
+# Maximum number of in-flight metadata requests (kept modest to stay polite to data.europa.eu)
+MAX_CONCURRENT_REQUESTS = 16
+
+# Number of JSON-LD documents merged into a single parse in each worker process
+PARSE_BATCH_SIZE = 50
+
+# Maximum number of items buffered between harvest pipeline stages
+PIPELINE_QUEUE_SIZE = 64
+
+# Start method of the parse worker processes: neither inherits the running fetch thread as fork would;
+# forkserver is unavailable on Windows, where spawn is used instead
+PARSE_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# Number of datasets sent to PostGIS/Qdrant per indexing call
+INDEX_BATCH_SIZE = 256
+
 # API endpoints
 EDP_SEARCH_API = "https://data.europa.eu/api/hub/search/datasets"
 EDP_METADATA_API = "https://data.europa.eu/api/hub/repo/datasets"
 
+HTTP_HEADERS = {"Accept-Encoding": "gzip, deflate", "User-Agent": "edp-harvester/1.0"}
+# Metadata requests ask for JSON-LD directly so the server can skip content negotiation
+JSONLD_HEADERS = {"Accept": "application/ld+json"}
+# Separate (connect, read) timeouts in seconds
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Shared HTTP session so requests to the EDP host reuse pooled connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+SESSION.headers.update(HTTP_HEADERS)
+
+# Cache remote JSON-LD contexts so each one is fetched once per process instead of on every parse
+_load_remote_document = jsonld.requests_document_loader(timeout=5)
+
+@lru_cache(maxsize=64)
+def _load_cached_document(url: str) -> Dict[str, Any]:
+    return _load_remote_document(url, {})
+
+def cached_document_loader(url: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """pyld document loader backed by a per-process cache of remote documents"""
+    return copy.deepcopy(_load_cached_document(url))
+
+jsonld.set_document_loader(cached_document_loader)
+
 # RDF Namespaces
-DCT = Namespace("http://purl.org/dc/terms/")
-DCAT = Namespace("http://www.w3.org/ns/dcat#")
-LOCN = Namespace("http://www.w3.org/ns/locn#")
-FOAF = Namespace("http://xmlns.com/foaf/0.1/")
-PROV = Namespace("http://www.w3.org/ns/prov#")
+DCT = "http://purl.org/dc/terms/"
+DCAT = "http://www.w3.org/ns/dcat#"
+LOCN = "http://www.w3.org/ns/locn#"
+FOAF = "http://xmlns.com/foaf/0.1/"
+PROV = "http://www.w3.org/ns/prov#"
+
+# Expanded IRIs of the terms read from the JSON-LD metadata
+DCAT_DATASET = DCAT + "Dataset"
+DCT_TITLE = DCT + "title"
+DCT_DESCRIPTION = DCT + "description"
+DCT_SPATIAL = DCT + "spatial"
+DCAT_KEYWORD = DCAT + "keyword"
+DCAT_BBOX = DCAT + "bbox"
+DCAT_DISTRIBUTION = DCAT + "distribution"
+DCAT_ACCESS_URL = DCAT + "accessURL"
+DCAT_DOWNLOAD_URL = DCAT + "downloadURL"
+LOCN_GEOMETRY = LOCN + "geometry"
 
 # Configure logging
 logging.basicConfig(
@@ -60,7 +128,7 @@ def list_catalogue_datasets(catalogue_id: str, limit: int = 100) -> List:
     
     try:
         logger.info(f"Fetching datasets from catalogue '{catalogue_id}'...")
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         dataset_ids = response.json()
         logger.info(f"Found {len(dataset_ids)} datasets")
@@ -69,154 +137,433 @@ def list_catalogue_datasets(catalogue_id: str, limit: int = 100) -> List:
         logger.error(f"Error fetching datasets: {e}")
         return []
     
-def get_localized_value(graph: Graph, subject: URIRef, 
-                       predicate: URIRef, language: str) -> str:
+def build_language_index(node: Dict[str, Any], predicates: List[str]) -> Dict[str, Dict[Optional[str], List[str]]]:
     """
-    Extract a localized value from RDF graph.
+    Index the literals of a flattened JSON-LD node by predicate and language in a single pass.
+    
+    Args:
+        node: JSON-LD node in expanded form
+        predicates: Expanded predicate IRIs to index
+        
+    Returns:
+        Mapping of predicate -> language -> literal values, in document order
+    """
+    language_index = {}
+    for predicate in predicates:
+        for obj in node.get(predicate, []):
+            if "@value" in obj:
+                language_index.setdefault(predicate, {}).setdefault(obj.get("@language"), []).append(str(obj["@value"]))
+    return language_index
+
+def get_localized_value(language_index: Dict[str, Dict[Optional[str], List[str]]], predicate: str, language: str) -> str:
+    """
+    Extract a localized value from a language index built by build_language_index.
     
     Attempts to find a value in the specified language. Falls back to
     any available literal if the target language is not found.
     
     Args:
-        graph: RDF graph
-        subject: Subject URI
-        predicate: Predicate URI
+        language_index: Literals indexed by predicate and language
+        predicate: Expanded predicate IRI
         language: Language code (e.g., 'hr', 'en', 'de')
         
     Returns:
         Localized string value or 'N/A' if not found
     """
-    # Try to find value in target language
-    for obj in graph.objects(subject, predicate):
-        if isinstance(obj, Literal) and obj.language == language:
-            return str(obj)
-    
-    # Fall back to first available literal
-    for obj in graph.objects(subject, predicate):
-        if isinstance(obj, Literal):
-            return str(obj)
+    values_by_language = language_index.get(predicate, {})
     
-    return "N/A"
+    # Prefer the target language, fall back to the first available literal
+    values = values_by_language.get(language) or next(iter(values_by_language.values()), ["N/A"])
+    return values[0]
 
-def get_dataset_keywords(graph: Graph, subject: URIRef, language: str) -> List[str]:
+def get_dataset_keywords(language_index: Dict[str, Dict[Optional[str], List[str]]], language: str) -> List[str]:
     """
-    Extract keywords from the RDF Graph.
+    Extract keywords from a language index built by build_language_index.
     
     Attempts to find keywords in the specified language. Falls back to any available keywords if the target language is not found.
     """
+    keywords_by_language = language_index.get(DCAT_KEYWORD, {})
+    
     # find keywords in the target language
-    keywords = [
-        str(kw) for kw in graph.objects(subject, DCAT.keyword)
-        if isinstance(kw, Literal) and kw.language == language
-    ]
+    keywords = keywords_by_language.get(language, [])
     
     # fallback to any available keyword regardless of language
     if not keywords:
-        keywords = [
-            str(kw) for kw in graph.objects(subject, DCAT.keyword)
-            if isinstance(kw, Literal)
-        ]
+        keywords = [keyword for values in keywords_by_language.values() for keyword in values]
         
     return keywords or ["N/A"]
+
+def get_first_value(node: Dict[str, Any], predicate: str) -> Optional[str]:
+    """Return the first IRI or literal value of a predicate on a JSON-LD node, or None."""
+    obj = next(iter(node.get(predicate, [])), None)
+    if obj is None:
+        return None
+    return str(obj.get("@id", obj.get("@value")))
     
 
-def process_dataset(dataset_id: str, language: str) -> Dataset:
+async def fetch_jsonld(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, dataset_id: str) -> Optional[Dict[str, Any]]:
     """
-    Process a single dataset: fetch metadata, parse it, and create Dataset object.
+    Fetch the JSON-LD metadata of a single dataset.
     
     Args:
+        client: Shared async HTTP client
+        semaphore: Semaphore bounding the number of in-flight requests
         dataset_id: The dataset identifier
-        language: Language code for extracting localized content
         
     Returns:
-        Dataset object, or None if processing fails
+        Decoded JSON-LD document, or None if the request fails
     """
     url = f"{EDP_METADATA_API}/{dataset_id}.jsonld"
     
-    try:
-        # Fetch JSON-LD metadata
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        json_ld_data = response.text
-        
-        # Parse JSON-LD to RDF graph
-        graph = Graph()
-        graph.parse(data=json_ld_data, format="json-ld")
-        
-        # Find dataset URI
-        dataset_uri = None
-        for subject in graph.subjects(RDF.type, DCAT.Dataset):
-            dataset_uri = subject
-            break
-        
-        if not dataset_uri:
-            logger.warning(f"No DCAT Dataset found for {dataset_id}")
+    async with semaphore:
+        try:
+            response = await client.get(url, headers=JSONLD_HEADERS)
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Error fetching metadata for {dataset_id}: {e}")
             return None
+
+async def fetch_jsonld_to_queue(dataset_ids: List[str], raw_queue: queue.Queue,
+                                stop: Optional[threading.Event] = None) -> None:
+    """
+    Fetch the JSON-LD metadata of all datasets concurrently, handing each document to raw_queue as soon as it arrives.
+    Once stop is set, the remaining datasets are skipped.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    transport = httpx.AsyncHTTPTransport(retries=3, limits=httpx.Limits(max_connections=32))
+    timeout = httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+    async with httpx.AsyncClient(transport=transport, headers=HTTP_HEADERS, timeout=timeout) as client:
+        async def fetch_and_enqueue(dataset_id: str) -> None:
+            if stop is not None and stop.is_set():
+                return
+            document = await fetch_jsonld(client, semaphore, dataset_id)
+            if document is not None and not (stop is not None and stop.is_set()):
+                # the blocking put runs in a thread so a full queue does not stall the event loop
+                await asyncio.to_thread(raw_queue.put, (dataset_id, document))
         
-        # Extract title and description
-        title = get_localized_value(graph, dataset_uri, DCT.title, language)
-        description = get_localized_value(graph, dataset_uri, DCT.description, language)
-        
-        # Extract keywords
-        keywords = get_dataset_keywords(graph, dataset_uri, language)
+        await asyncio.gather(*(fetch_and_enqueue(dataset_id) for dataset_id in dataset_ids))
+
+def extract_dataset(nodes: Dict[str, Dict[str, Any]], dataset_node: Dict[str, Any],
+                    dataset_id: str, language: str) -> Dataset:
+    """
+    Build a Dataset object from a flattened JSON-LD dataset node.
+    
+    Args:
+        nodes: Flattened JSON-LD nodes keyed by @id, used to resolve references
+        dataset_node: The dcat:Dataset node
+        dataset_id: The dataset identifier
+        language: Language code for extracting localized content
+    """
+    # Index the localized literals once and reuse the index for title, description and keywords
+    language_index = build_language_index(dataset_node, [DCT_TITLE, DCT_DESCRIPTION, DCAT_KEYWORD])
+    
+    # Extract title and description
+    title = get_localized_value(language_index, DCT_TITLE, language)
+    description = get_localized_value(language_index, DCT_DESCRIPTION, language)
+    
+    # Extract keywords
+    keywords = get_dataset_keywords(language_index, language)
+    
+    # Extract spatial extent
+    spatial_extent = []
+    for spatial in dataset_node.get(DCT_SPATIAL, []):
+        spatial_node = nodes.get(spatial.get("@id"), {})
+        bbox = get_first_value(spatial_node, DCAT_BBOX)
+        geom = get_first_value(spatial_node, LOCN_GEOMETRY)
+        if bbox:
+            spatial_extent.append(bbox)
+        elif geom:
+            spatial_extent.append(geom)
+        else:
+            spatial_extent.append(str(spatial.get("@id", spatial.get("@value"))))
+    spatial_extent = spatial_extent or ["N/A"]
+    
+    # Extract access and download URLs
+    access_urls = []
+    download_urls = []
+    for dist in dataset_node.get(DCAT_DISTRIBUTION, []):
+        dist_node = nodes.get(dist.get("@id"), {})
+        access_url = get_first_value(dist_node, DCAT_ACCESS_URL)
+        download_url = get_first_value(dist_node, DCAT_DOWNLOAD_URL)
+        if access_url:
+            access_urls.append(access_url)
+        if download_url:
+            download_urls.append(download_url)
+    
+    access_urls = access_urls or ["N/A"]
+    download_urls = download_urls or ["N/A"]
+    
+    return Dataset(
+        dataset_id=dataset_id,
+        titles=[title],
+        descriptions=[description],
+        keywords=keywords,
+        access_urls=access_urls,
+        download_urls=download_urls,
+        spatial_extent=spatial_extent[0]
+    )
+
+def _expand_iri(value: str, prefixes: Dict[str, str]) -> str:
+    """Expand a term or compact IRI against a prefix-only @context; raises ValueError if it cannot be expanded."""
+    if value in prefixes:
+        return prefixes[value]
+    prefix, sep, local = value.partition(":")
+    if sep and prefix in prefixes:
+        return prefixes[prefix] + local
+    if sep and (local.startswith("//") or prefix in ("_", "urn", "mailto")):
+        return value
+    raise ValueError(f"Cannot expand '{value}' without a full JSON-LD processor")
+
+def _flatten_simple_jsonld(document: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Flatten a JSON-LD document whose @context only declares namespace prefixes, without
+    running the full JSON-LD algorithms. Produces nodes in the same expanded shape as
+    jsonld.flatten, keyed by @id.
+    
+    Raises:
+        ValueError, KeyError or TypeError if the document uses features this fast path does not handle
+    """
+    context = document.get("@context", {})
+    if not isinstance(context, dict) or not all(
+        isinstance(key, str) and not key.startswith("@") and isinstance(value, str)
+        for key, value in context.items()
+    ):
+        raise ValueError("@context is not a plain prefix map")
+    # prefix values may themselves be compact IRIs
+    prefixes = {key: _expand_iri(value, context) for key, value in context.items()}
+    
+    if "@graph" in document:
+        if not set(document) <= {"@context", "@graph"}:
+            raise ValueError("Unsupported top-level @graph document")
+        top_level = document["@graph"]
+    else:
+        top_level = [{key: value for key, value in document.items() if key != "@context"}]
+    
+    nodes = {}
+    blank_node_count = 0
+    
+    def add_node(node: Dict[str, Any]) -> str:
+        nonlocal blank_node_count
+        if "@id" in node:
+            node_id = _expand_iri(node["@id"], prefixes)
+        else:
+            node_id = f"_:genid{blank_node_count}"
+            blank_node_count += 1
+        flat = nodes.setdefault(node_id, {"@id": node_id})
         
-        # Extract spatial extent
-        spatial_extent = []
-        for spatial in graph.objects(dataset_uri, DCT.spatial):
-            bbox = graph.value(spatial, DCAT.bbox)
-            geom = graph.value(spatial, LOCN.geometry)
-            if bbox:
-                spatial_extent.append(str(bbox))
-            elif geom:
-                spatial_extent.append(str(geom))
-            else:
-                spatial_extent.append(str(spatial))
-        spatial_extent = spatial_extent or ["N/A"]
+        for key, values in node.items():
+            if key == "@id":
+                continue
+            if not isinstance(values, list):
+                values = [values]
+            if key == "@type":
+                flat.setdefault("@type", []).extend(_expand_iri(value, prefixes) for value in values)
+                continue
+            if key.startswith("@"):
+                raise ValueError(f"Unsupported keyword {key}")
+            
+            objects = flat.setdefault(_expand_iri(key, prefixes), [])
+            for value in values:
+                if isinstance(value, dict):
+                    if "@value" in value:
+                        if not set(value) <= {"@value", "@language", "@type"}:
+                            raise ValueError("Unsupported value object")
+                        if "@type" in value:
+                            value = {**value, "@type": _expand_iri(value["@type"], prefixes)}
+                        objects.append(value)
+                    elif set(value) == {"@id"}:
+                        objects.append({"@id": _expand_iri(value["@id"], prefixes)})
+                    else:
+                        # embedded node: flatten it and keep a reference
+                        objects.append({"@id": add_node(value)})
+                elif isinstance(value, (str, int, float, bool)):
+                    objects.append({"@value": value})
+                else:
+                    raise TypeError(f"Unsupported value {value!r}")
+        return node_id
+    
+    for node in top_level:
+        add_node(node)
+    return nodes
+
+def flatten_jsonld(document: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    Flatten a JSON-LD document into nodes keyed by @id, taking the fast path for
+    simple prefix-only documents and falling back to pyld for everything else.
+    """
+    try:
+        return _flatten_simple_jsonld(document)
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return {node["@id"]: node for node in jsonld.flatten(document)}
+
+def find_dataset_node(nodes: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Return the first dcat:Dataset node among the flattened nodes, or None."""
+    return next(
+        (node for node in nodes.values() if DCAT_DATASET in node.get("@type", [])),
+        None
+    )
+
+def parse_jsonld(json_ld_data: Dict[str, Any], dataset_id: str, language: str) -> Optional[Dataset]:
+    """
+    Parse a single dataset's JSON-LD metadata into a Dataset object.
+    
+    Args:
+        json_ld_data: Decoded JSON-LD document
+        dataset_id: The dataset identifier
+        language: Language code for extracting localized content
         
-        # Extract access and download URLs
-        access_urls = []
-        download_urls = []
-        for dist in graph.objects(dataset_uri, DCAT.distribution):
-            access_url = graph.value(dist, DCAT.accessURL)
-            download_url = graph.value(dist, DCAT.downloadURL)
-            if access_url:
-                access_urls.append(str(access_url))
-            if download_url:
-                download_urls.append(str(download_url))
+    Returns:
+        Dataset object, or None if parsing fails
+    """
+    try:
+        # Flatten the JSON-LD so every node is addressable by its @id
+        nodes = flatten_jsonld(json_ld_data)
         
-        access_urls = access_urls or ["N/A"]
-        download_urls = download_urls or ["N/A"]
+        # Find dataset node
+        dataset_node = find_dataset_node(nodes)
         
-        # Create and return Dataset object
-        dataset = Dataset(
-            dataset_id=dataset_id,
-            titles=[title],
-            descriptions=[description],
-            keywords=keywords,
-            access_urls=access_urls,
-            download_urls=download_urls,
-            spatial_extent=spatial_extent[0]
-        )
+        if not dataset_node:
+            logger.warning(f"No DCAT Dataset found for {dataset_id}")
+            return None
         
+        dataset = extract_dataset(nodes, dataset_node, dataset_id, language)
         logger.info(f"Processed: {dataset_id}")
         return dataset
         
-    except requests.exceptions.RequestException as e:
-        logger.warning(f"Error fetching metadata for {dataset_id}: {e}")
-        return None
     except Exception as e:
         logger.warning(f"Error processing {dataset_id}: {e}")
         return None
 
+def _scope_blank_nodes(value: Any, prefix: str) -> Any:
+    """Prefix explicit blank node identifiers so they stay distinct once documents are merged."""
+    if isinstance(value, list):
+        return [_scope_blank_nodes(item, prefix) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: (f"_:{prefix}-{item[2:]}" if key == "@id" and isinstance(item, str) and item.startswith("_:")
+                  else _scope_blank_nodes(item, prefix))
+            for key, item in value.items()
+        }
+    return value
+
+def merge_jsonld_documents(documents: List[Any]) -> Dict[str, Any]:
+    """
+    Merge several JSON-LD documents into a single @graph document so they can be
+    processed in one pass. Each top-level node keeps its document's @context embedded.
+    """
+    graph = []
+    for index, document in enumerate(documents):
+        document = _scope_blank_nodes(document, f"d{index}")
+        if isinstance(document, list):
+            graph.extend(document)
+            continue
+        
+        context = document.get("@context")
+        if "@graph" in document and set(document) <= {"@context", "@graph"}:
+            nodes = document["@graph"]
+        else:
+            nodes = [document]
+        for node in nodes:
+            if context is not None and isinstance(node, dict) and "@context" not in node:
+                node = {"@context": context, **node}
+            graph.append(node)
+    return {"@graph": graph}
+
+def parse_jsonld_batch(documents: List[Dict[str, Any]], dataset_ids: List[str], language: str) -> List[Dataset]:
+    """
+    Parse the JSON-LD metadata of several datasets with a single flatten pass, amortizing
+    the JSON-LD processing setup over the batch. Performs no network I/O apart from (cached)
+    remote context lookups, so it can run in a worker process.
+    
+    Simple prefix-only documents are flattened directly and skip pyld entirely; the rest
+    are merged and flattened together. Merged datasets are matched to their identifiers
+    through the last path segment of the dcat:Dataset URI; documents whose dataset is not
+    matched that way, and all documents of a merged batch that fails, are parsed separately.
+    
+    Returns:
+        List of the Dataset objects that could be parsed
+    """
+    datasets = []
+    complex_documents = []
+    complex_ids = []
+    for document, dataset_id in zip(documents, dataset_ids):
+        try:
+            nodes = _flatten_simple_jsonld(document)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            complex_documents.append(document)
+            complex_ids.append(dataset_id)
+            continue
+        
+        dataset_node = find_dataset_node(nodes)
+        if not dataset_node:
+            logger.warning(f"No DCAT Dataset found for {dataset_id}")
+            continue
+        try:
+            datasets.append(extract_dataset(nodes, dataset_node, dataset_id, language))
+            logger.info(f"Processed: {dataset_id}")
+        except Exception as e:
+            logger.warning(f"Error processing {dataset_id}: {e}")
+    
+    if complex_documents:
+        datasets.extend(_parse_merged_jsonld_batch(complex_documents, complex_ids, language))
+    return datasets
+
+def _parse_merged_jsonld_batch(documents: List[Dict[str, Any]], dataset_ids: List[str], language: str) -> List[Dataset]:
+    """Parse several JSON-LD documents with a single pyld flatten pass over their merged graph."""
+    try:
+        merged = merge_jsonld_documents(documents)
+        nodes = {node["@id"]: node for node in jsonld.flatten(merged)}
+    except Exception as e:
+        logger.warning(f"Error processing batch of {len(documents)} datasets, parsing individually: {e}")
+        parsed = (parse_jsonld(document, dataset_id, language) for document, dataset_id in zip(documents, dataset_ids))
+        return [dataset for dataset in parsed if dataset]
+    
+    pending_ids = set(dataset_ids)
+    datasets = []
+    for node in nodes.values():
+        if DCAT_DATASET not in node.get("@type", []):
+            continue
+        
+        dataset_id = node["@id"].rstrip("/").rsplit("/", 1)[-1]
+        if dataset_id not in pending_ids:
+            continue
+        pending_ids.discard(dataset_id)
+        
+        try:
+            datasets.append(extract_dataset(nodes, node, dataset_id, language))
+            logger.info(f"Processed: {dataset_id}")
+        except Exception as e:
+            logger.warning(f"Error processing {dataset_id}: {e}")
+    
+    # dataset URIs need not end in the requested id; parse the unmatched documents on their own
+    for document, dataset_id in zip(documents, dataset_ids):
+        if dataset_id in pending_ids:
+            dataset = parse_jsonld(document, dataset_id, language)
+            if dataset:
+                datasets.append(dataset)
+    
+    return datasets
+
+def batched(datasets: List[Dataset], size: int) -> Iterator[List[Dataset]]:
+    """Split the datasets into consecutive chunks of at most `size` items."""
+    for start in range(0, len(datasets), size):
+        yield datasets[start:start + size]
+
 def index_datasets_in_postgis(datasets: List[Dataset]) -> bool:
     """Index datasets in PostGIS database"""
     logger.info("Indexing datasets in PostGIS")
     try:
         postgis_service = PostGISService()
-        postgis_service.connect()
-        postgis_service.initialize_schema()
-        inserted_count = postgis_service.insert_datasets(datasets)
-        postgis_service.disconnect()
+        with postgis_service.session():
+            postgis_service.initialize_schema(bulk_load=True)
+            inserted_count = 0
+            try:
+                for batch in batched(datasets, INDEX_BATCH_SIZE):
+                    inserted_count += postgis_service.insert_datasets(batch)
+            finally:
+                # the table must not stay unlogged even if indexing fails part way
+                postgis_service.finish_bulk_load()
         logger.info(f"Inserted {inserted_count} datasets into PostGIS")
         return True
     except Exception as e:
@@ -229,7 +576,10 @@ def index_datasets_in_qdrant(datasets: List[Dataset]) -> bool:
     try:
         vector_store = QdrantVectorStoreManager()
         vector_store.initialize()
-        vector_store.add_datasets(datasets)
+        response_cache = QdrantResponseCache(vector_store.client)
+        for batch in batched(datasets, INDEX_BATCH_SIZE):
+            vector_store.add_datasets(batch)
+            response_cache.invalidate([dataset.dataset_id for dataset in batch])
         logger.info(f"Added {len(datasets)} datasets to Qdrant")
         return True
     except Exception as e:
@@ -243,6 +593,94 @@ def index_datasets(datasets: List[Dataset]) -> bool:
         index_datasets_in_qdrant(datasets)
     )
     
+def _fetch_stage(dataset_ids: List[str], raw_queue: queue.Queue, stop: threading.Event) -> None:
+    """Pipeline stage 1: fetch metadata documents into raw_queue, then signal completion with None."""
+    try:
+        asyncio.run(fetch_jsonld_to_queue(dataset_ids, raw_queue, stop))
+    except Exception as e:
+        logger.error(f"Error fetching metadata: {e}")
+    finally:
+        raw_queue.put(None)
+
+def _parse_stage(raw_queue: queue.Queue, parsed_queue: queue.Queue, language: str, stop: threading.Event) -> None:
+    """
+    Pipeline stage 2: parse documents from raw_queue in batches across worker processes and
+    forward the resulting Dataset objects to parsed_queue, then signal completion with None.
+    Once stop is set, the remaining documents are discarded until the fetch stage finishes.
+    """
+    try:
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context(PARSE_START_METHOD)) as executor:
+            pending = deque()
+            batch = []
+            exhausted = False
+            while not exhausted:
+                item = raw_queue.get()
+                exhausted = item is None
+                if stop.is_set():
+                    continue
+                if not exhausted:
+                    batch.append(item)
+                
+                if batch and (exhausted or len(batch) >= PARSE_BATCH_SIZE):
+                    pending.append(executor.submit(
+                        parse_jsonld_batch,
+                        [document for _, document in batch],
+                        [dataset_id for dataset_id, _ in batch],
+                        language
+                    ))
+                    batch = []
+                
+                # forward finished batches in order; wait for all of them once the input is exhausted
+                while pending and (exhausted or pending[0].done()):
+                    for dataset in pending.popleft().result():
+                        parsed_queue.put(dataset)
+            
+            for future in pending:
+                future.cancel()
+    except Exception as e:
+        logger.error(f"Error parsing metadata: {e}")
+    finally:
+        parsed_queue.put(None)
+
+def _index_stage(parsed_queue: queue.Queue) -> int:
+    """
+    Pipeline stage 3: index Dataset objects from parsed_queue in PostGIS and Qdrant,
+    one batch at a time, until the parse stage signals completion.
+    
+    Returns:
+        Number of datasets indexed
+    """
+    # set up Qdrant first, so a failure there happens before the table is switched to bulk-load mode
+    vector_store = QdrantVectorStoreManager()
+    vector_store.initialize()
+    # cached answers citing re-harvested datasets may be stale
+    response_cache = QdrantResponseCache(vector_store.client)
+    
+    postgis_service = PostGISService()
+    with postgis_service.session():
+        postgis_service.initialize_schema(bulk_load=True)
+        indexed_count = 0
+        batch = []
+        exhausted = False
+        try:
+            while not exhausted:
+                dataset = parsed_queue.get()
+                exhausted = dataset is None
+                if not exhausted:
+                    batch.append(dataset)
+                
+                if batch and (exhausted or len(batch) >= INDEX_BATCH_SIZE):
+                    inserted_count = postgis_service.insert_datasets(batch)
+                    vector_store.add_datasets(batch)
+                    response_cache.invalidate([dataset.dataset_id for dataset in batch])
+                    logger.info(f"Indexed batch of {len(batch)} datasets ({inserted_count} with a spatial extent in PostGIS)")
+                    indexed_count += len(batch)
+                    batch = []
+        finally:
+            # the table must not stay unlogged even if indexing fails part way
+            postgis_service.finish_bulk_load()
+        return indexed_count
+    
 def harvest_and_index_datasets(catalogue_id: str,
                                language: str,
                                limit: int,
@@ -250,6 +688,9 @@ def harvest_and_index_datasets(catalogue_id: str,
     """
     Main harvest function: fetch datasets, process them, and index in databases.
     
+    Fetching, parsing and indexing run as a pipeline connected by bounded queues, so
+    network I/O, JSON-LD parsing and database writes overlap and memory use stays bounded.
+    
     Args:
         catalogue_id: The catalogue to harvest from
         language: Language code for metadata extraction
@@ -271,22 +712,36 @@ def harvest_and_index_datasets(catalogue_id: str,
     dataset_ids = dataset_ids[start_index:]
     logger.info(f"Processing {len(dataset_ids)} datasets starting from index {start_index}")
     
-    # Process each dataset
-    processed_datasets = []
-    for dataset_id in dataset_ids:
-        dataset = process_dataset(dataset_id, language=language)
-        if dataset:
-            processed_datasets.append(dataset)
-        else:
-            logger.warning(f"Failed to process dataset {dataset_id}")
+    raw_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    parsed_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    stop = threading.Event()
+    fetch_stage = threading.Thread(target=_fetch_stage, args=(dataset_ids, raw_queue, stop), daemon=True)
+    parse_stage = threading.Thread(target=_parse_stage, args=(raw_queue, parsed_queue, language, stop), daemon=True)
+    for stage in (fetch_stage, parse_stage):
+        stage.start()
     
-    if not processed_datasets:
-        logger.error("No datasets were successfully processed")
+    try:
+        indexed_count = _index_stage(parsed_queue)
+    except Exception as e:
+        logger.error(f"Error indexing datasets: {e}")
         return False
+    finally:
+        # on failure, stop the upstream stages and drain parsed_queue so none stays blocked on a full queue
+        stop.set()
+        while parse_stage.is_alive():
+            try:
+                parsed_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for stage in (fetch_stage, parse_stage):
+            stage.join()
     
-    logger.info(f"Successfully processed {len(processed_datasets)} datasets")
+    if not indexed_count:
+        logger.error("No datasets were successfully processed")
+        return False
     
-    return index_datasets(processed_datasets)
+    logger.info(f"Successfully processed and indexed {indexed_count} datasets")
+    return True
 
 def harvest_from_local_file(file_path: str='data/gdi_de_catalog.rdf') -> bool:
     """Harvest datasets from a local RDF file and index them"""
@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from shapely import wkt
+from shapely.geometry import mapping
 
 @dataclass
 class Dataset:
@@ -11,6 +13,23 @@ class Dataset:
     access_urls: List[str]
     download_urls: List[str]
     spatial_extent: Optional[str] = None # WKT representation of the spatial extent
+    spatial_extent_geojson: Optional[dict] = field(default=None, init=False) # GeoJSON of the extent, derived from the WKT
+    spatial_extent_bounds: Optional[Tuple[float, float, float, float]] = field(default=None, init=False) # (minx, miny, maxx, maxy)
+
+    def __post_init__(self):
+        """
+        Parse the WKT extent once at harvest time so consumers never need to parse it at request time.
+        Extents that are not valid WKT (e.g. location URIs) are left without GeoJSON and bounds.
+        """
+        if not self.spatial_extent:
+            return
+        try:
+            geom = wkt.loads(self.spatial_extent)
+        except Exception:
+            return
+        if not geom.is_empty:
+            self.spatial_extent_geojson = mapping(geom)
+            self.spatial_extent_bounds = geom.bounds
 
     @property
     def primary_title(self) -> Optional[str]:
@@ -59,6 +78,8 @@ class Dataset:
             "description": self.primary_description,
             "keywords": self.keywords,
             "spatial_extent": self.spatial_extent_wkt,
+            "spatial_extent_geojson": self.spatial_extent_geojson,
+            "spatial_extent_bounds": self.spatial_extent_bounds,
             "access_urls": self.access_urls,
             "download_urls": self.download_urls
         }
\ No newline at end of file
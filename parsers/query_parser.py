@@ -1,11 +1,14 @@
 import logging
+from functools import lru_cache, cached_property
 from typing import List, Optional, Dict, Any
 from dataclasses import dataclass
 
+import httpx
+from threading import Lock
+from cachetools import LRUCache
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, computed_field
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,6 +17,20 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# HTTP settings shared by every OpenAI client so queries reuse warm, multiplexed connections
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=3.0)
+
+# Number of parsed intents kept per parser, keyed by normalized query text
+PARSE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=1)
+def get_openai_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    """Return the shared sync and async HTTP/2 clients used for OpenAI requests."""
+    http_client = httpx.Client(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+    http_async_client = httpx.AsyncClient(http2=True, limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT)
+    return http_client, http_async_client
+
 @dataclass
 class Config:
     """Configuration for the query parser."""
@@ -24,24 +41,30 @@ class Config:
 class QueryIntent(BaseModel):
     """Structured representation of a geospatial query intent."""
 
+    # intents are cached and shared between requests, so they must not be modified
+    model_config = ConfigDict(frozen=True)
+
     raw_theme: str = Field(description="Core search topic/phrase verbatim from the query")
     locations: List[str] = Field(default_factory=list, description="List of place names or locations for geocoding")
     themes: List[str] = Field(default_factory=list, description="Main themes from the query that have not explicitly been stated")
     publishers: List[str] = Field(default_factory=list, description="List of publishers or data sources mentioned")
     language: str = Field(description="Language used in the query")
 
-    @validator('raw_theme')
+    @field_validator('raw_theme')
+    @classmethod
     def validate_raw_theme(cls, v):
         """Ensure raw theme is not empty."""
         if not v or not v.strip():
             raise ValueError("raw_theme cannot be empty")
         return v.strip()
 
+    @computed_field
     @property
     def has_location(self) -> bool:
         """Check if the query contains location mentions"""
         return len(self.locations) > 0
     
+    @computed_field
     @property
     def core_search_terms(self) -> List[str]:
         """Get core search terms combining raw_theme and themes."""
@@ -49,17 +72,14 @@ class QueryIntent(BaseModel):
         terms.extend(self.themes)
         return [term.strip() for term in terms if term.strip()]
     
+    @cached_property
+    def search_query(self) -> str:
+        """Core search terms joined into the text used for semantic search, computed once per intent."""
+        return " ".join(self.core_search_terms)
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
-        return {
-            "raw_theme": self.raw_theme,
-            "locations": self.locations,
-            "themes": self.themes,
-            "publishers": self.publishers,
-            "language": self.language,
-            "has_location": self.has_location,
-            "core_search_terms": self.core_search_terms
-        }
+        return self.model_dump()
     
 
 class QueryParser:
@@ -76,20 +96,19 @@ class QueryParser:
         4. publishers: Organizations, agencies, or data publishers mentioned (e.g., "city of Berlin", "European Space Agency")
         5. language: Language used in the user query (e.g English)
 
-    Format your response as a JSON that matches this pydantic schema:
-    {format_instructions}
-
     Query: {query}
     """
 
     def __init__(self, config: Optional[Config] = None):
         """Initialize the parser."""
         self.config = config or Config()
+        http_client, http_async_client = get_openai_http_clients()
         self.model = ChatOpenAI(
             model_name=self.config.model_name,
-            temperature=self.config.temperature
+            temperature=self.config.temperature,
+            http_client=http_client,
+            http_async_client=http_async_client
         )
-        self.parser = PydanticOutputParser(pydantic_object=QueryIntent)
 
         self.prompt = ChatPromptTemplate.from_messages(
             [
@@ -98,7 +117,25 @@ class QueryParser:
             ]
         )
 
-        self.chain = self.prompt | self.model | self.parser
+        # native structured output returns a validated QueryIntent without schema text in the prompt
+        self.chain = self.prompt | self.model.with_structured_output(QueryIntent, method="json_schema")
+
+        # recurring queries reuse their parsed intent instead of calling the LLM again
+        self._parse_cache = LRUCache(maxsize=PARSE_CACHE_SIZE)
+        self._parse_cache_lock = Lock()
+
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        """Normalize a query so trivially different spellings share a cache entry."""
+        return " ".join(query.lower().split())
+
+    def _get_cached_intent(self, query: str) -> Optional[QueryIntent]:
+        with self._parse_cache_lock:
+            return self._parse_cache.get(self._cache_key(query))
+
+    def _cache_intent(self, query: str, intent: QueryIntent) -> None:
+        with self._parse_cache_lock:
+            self._parse_cache[self._cache_key(query)] = intent
 
     def parse(self, query:str) -> QueryIntent:
         """Parse a natural language query into a structured intent."""
@@ -106,16 +143,74 @@ class QueryParser:
         if not query or not query.strip():
             raise ValueError("Query cannot be empty")
         
+        cached_intent = self._get_cached_intent(query)
+        if cached_intent is not None:
+            logger.info(f"Using cached intent for query: {query}")
+            return cached_intent
+
         try:
             logger.info(f"Parsing query: {query}")
-            result = self.chain.invoke({"query": query, "format_instructions": self.parser.get_format_instructions()})
+            result = self.chain.invoke({"query": query})
             logger.info(f"Successfully parsed: {result}")
+            self._cache_intent(query, result)
             return result
         except Exception as e:
             logger.error(f"Failed to parse query: {e}")
             raise
 
+    async def aparse(self, query: str) -> QueryIntent:
+        """Async variant of parse that awaits the LLM call instead of blocking a worker thread."""
+
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+
+        cached_intent = self._get_cached_intent(query)
+        if cached_intent is not None:
+            logger.info(f"Using cached intent for query: {query}")
+            return cached_intent
+
+        try:
+            logger.info(f"Parsing query: {query}")
+            result = await self.chain.ainvoke({"query": query})
+            logger.info(f"Successfully parsed: {result}")
+            self._cache_intent(query, result)
+            return result
+        except Exception as e:
+            logger.error(f"Failed to parse query: {e}")
+            raise
+
+    def parse_batch(self, queries: List[str]) -> List[Any]:
+        """
+        Parse several queries concurrently through the chain's batch interface.
+        Returns one QueryIntent per query, or the exception raised for that query, in input order.
+        """
+
+        results = [ValueError("Query cannot be empty") for _ in queries]
+        valid = []
+        for i, query in enumerate(queries):
+            if query and query.strip():
+                results[i] = self._get_cached_intent(query)
+                if results[i] is None:
+                    valid.append(i)
+        if not valid:
+            return results
+
+        logger.info(f"Parsing batch of {len(valid)} queries")
+        parsed = self.chain.batch([{"query": queries[i]} for i in valid], return_exceptions=True)
+        for i, result in zip(valid, parsed):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to parse query '{queries[i]}': {result}")
+            else:
+                self._cache_intent(queries[i], result)
+            results[i] = result
+        return results
+
+@lru_cache(maxsize=1)
+def _get_default_parser() -> QueryParser:
+    """Return a shared QueryParser with the default configuration."""
+    return QueryParser()
+
 def parse_query(query: str, config: Optional[Config] = None) -> QueryIntent:
     """Convenience function to parse a query using the default configuration."""
-    parser = QueryParser(config)
+    parser = QueryParser(config) if config else _get_default_parser()
     return parser.parse(query)
\ No newline at end of file
@@ -1,18 +1,36 @@
-from typing import List, Optional
-from rdflib import Graph, Namespace, RDF, Literal
+from pathlib import Path
+from typing import List, Optional, Iterator
+import pyoxigraph as ox
 from models.dataset import Dataset
 import logging
 
+# RDF Namespaces
+RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+DCAT = "http://www.w3.org/ns/dcat#"
+DCT = "http://purl.org/dc/terms/"
+FOAF = "http://xmlns.com/foaf/0.1/"
+LOCN = "http://www.w3.org/ns/locn#"
+GEOSPARQL = "http://www.opengis.net/ont/geosparql#"
+
+# RDF terms used for the store lookups, built once at import
+RDF_TYPE = ox.NamedNode(RDF + "type")
+DCAT_DATASET = ox.NamedNode(DCAT + "Dataset")
+DCAT_KEYWORD = ox.NamedNode(DCAT + "keyword")
+DCAT_DISTRIBUTION = ox.NamedNode(DCAT + "distribution")
+DCAT_ACCESS_URL = ox.NamedNode(DCAT + "accessURL")
+DCAT_DOWNLOAD_URL = ox.NamedNode(DCAT + "downloadURL")
+DCT_TITLE = ox.NamedNode(DCT + "title")
+DCT_DESCRIPTION = ox.NamedNode(DCT + "description")
+DCT_IDENTIFIER = ox.NamedNode(DCT + "identifier")
+DCT_SPATIAL = ox.NamedNode(DCT + "spatial")
+LOCN_GEOMETRY = ox.NamedNode(LOCN + "geometry")
+WKT_LITERAL = GEOSPARQL + "wktLiteral"
+
 
 class RDFParser:
     """Parses RDF files to extract DCAT datasets and their metadata."""
 
     def __init__(self):
-        self.dcat = Namespace("http://www.w3.org/ns/dcat#")
-        self.dct = Namespace("http://purl.org/dc/terms/")
-        self.foaf = Namespace("http://xmlns.com/foaf/0.1/")
-        self.locn = Namespace("http://www.w3.org/ns/locn#")
-        self.geosparql = Namespace("http://www.opengis.net/ont/geosparql#")
         self.logger = logging.getLogger(__name__)
 
     def parse_file(self, file_path: str) -> List[Dataset]:
@@ -20,45 +38,53 @@ class RDFParser:
         Parses RDF files and return a list of Dataset objects
         """
 
-        graph = self._load_graph(file_path)
-        return self._extract_datasets(graph)
-    
-    def _load_graph(self, file_path: str) -> Graph:
+        store = self._load_store(file_path)
+        return self._extract_datasets(store)
+
+    def _load_store(self, file_path: str) -> ox.Store:
+        """
+        Loads an RDF/XML file into an in-memory pyoxigraph store.
+        Relative IRIs in the file are resolved against the file's own URI.
+        """
+
+        store = ox.Store()
+        store.load(path=file_path, format=ox.RdfFormat.RDF_XML, base_iri=Path(file_path).resolve().as_uri())
+        return store
+
+    def _objects(self, store: ox.Store, subject, predicate) -> Iterator:
         """
-        Loads an RDF graph from a file.
+        Yields the objects of all triples matching the subject and predicate.
         """
 
-        graph = Graph()
-        with open(file_path, "r", encoding="utf-8") as f:
-            graph.parse(f, format="application/rdf+xml")
-        return graph
+        return (quad.object for quad in store.quads_for_pattern(subject, predicate, None, None))
 
-    def _extract_datasets(self, graph: Graph) -> List[Dataset]:
+    def _extract_datasets(self, store: ox.Store) -> List[Dataset]:
         """
-        Extracts all datasets from the RDF grapg and returns them as a list of Dataset objects.
+        Extracts all datasets from the RDF store and returns them as a list of Dataset objects.
         """
 
         datasets = []
-        dataset_subjects = list(graph.subjects(RDF.type, self.dcat.Dataset))
+        dataset_subjects = [quad.subject for quad in store.quads_for_pattern(None, RDF_TYPE, DCAT_DATASET, None)]
 
         for dataset_uri in dataset_subjects:
-            dataset = self._extract_single_dataset(graph, dataset_uri)
+            dataset = self._extract_single_dataset(store, dataset_uri)
             datasets.append(dataset)
 
         return datasets
-    
-    def _extract_single_dataset(self, graph: Graph, dataset_uri) -> Dataset:
+
+    def _extract_single_dataset(self, store: ox.Store, dataset_uri) -> Dataset:
         """
-        Extracts a single dataset from the RDF graph and returns it as a Dataset object.
+        Extracts a single dataset from the RDF store and returns it as a Dataset object.
         """
 
-        titles = [str(title) for title in graph.objects(dataset_uri, self.dct.title)]
-        descriptions = [str(description) for description in graph.objects(dataset_uri, self.dct.description)]
-        keywords = [str(keyword) for keyword in graph.objects(dataset_uri, self.dcat.keyword)]
-        dataset_id = [(str(id) if id else None) for id in graph.objects(dataset_uri, self.dct.identifier)][0]
+        titles = [title.value for title in self._objects(store, dataset_uri, DCT_TITLE)]
+        descriptions = [description.value for description in self._objects(store, dataset_uri, DCT_DESCRIPTION)]
+        keywords = [keyword.value for keyword in self._objects(store, dataset_uri, DCAT_KEYWORD)]
+        identifier = next(self._objects(store, dataset_uri, DCT_IDENTIFIER), None)
+        dataset_id = identifier.value if identifier else None
 
-        access_urls, download_urls = self._extract_distribution_urls(graph, dataset_uri)
-        spatial_extent = self._extract_spatial_extent(graph, dataset_uri)
+        access_urls, download_urls = self._extract_distribution_urls(store, dataset_uri)
+        spatial_extent = self._extract_spatial_extent(store, dataset_uri)
 
         return Dataset(
             titles=titles,
@@ -69,23 +95,22 @@ class RDFParser:
             dataset_id=dataset_id,
             spatial_extent=spatial_extent
         )
-    
-    def _extract_distribution_urls(self, graph: Graph, dataset_uri) -> tuple[List[str], List[str]]:
+
+    def _extract_distribution_urls(self, store: ox.Store, dataset_uri) -> tuple[List[str], List[str]]:
         """
         Extracts access and download URLs from the dataset's distributions.
         """
 
-        distributions = list(graph.objects(dataset_uri, self.dcat.distribution))
         access_urls = []
         download_urls = []
 
-        for distribution in distributions:
-            access_urls.extend([str(url) for url in graph.objects(distribution, self.dcat.accessURL)])
-            download_urls.extend([str(url) for url in graph.objects(distribution, self.dcat.downloadURL)])
+        for distribution in self._objects(store, dataset_uri, DCAT_DISTRIBUTION):
+            access_urls.extend([url.value for url in self._objects(store, distribution, DCAT_ACCESS_URL)])
+            download_urls.extend([url.value for url in self._objects(store, distribution, DCAT_DOWNLOAD_URL)])
 
         return access_urls, download_urls
-    
-    def _extract_spatial_extent(self, graph: Graph, dataset_uri) -> str:
+
+    def _extract_spatial_extent(self, store: ox.Store, dataset_uri) -> Optional[str]:
         """
         Extracts the spatial extent of the dataset in WKT format.
 
@@ -96,16 +121,14 @@ class RDFParser:
         """
 
         try:
-            # find all spatial properties of the dataset
-            spatial_objects = list(graph.objects(dataset_uri, self.dct.spatial))
-
-            for spatial_obj in spatial_objects:
-                for geometry_obj in list(graph.objects(spatial_obj, self.locn.geometry)):
-                    if isinstance(geometry_obj, Literal):
+            # walk the spatial properties of the dataset, stopping at the first WKT geometry
+            for spatial_obj in self._objects(store, dataset_uri, DCT_SPATIAL):
+                for geometry_obj in self._objects(store, spatial_obj, LOCN_GEOMETRY):
+                    if isinstance(geometry_obj, ox.Literal):
                     # Check for specific WKT datatype
-                        if (geometry_obj.datatype and str(geometry_obj.datatype) == "http://www.opengis.net/ont/geosparql#wktLiteral"):
-                            return str(geometry_obj)
+                        if (geometry_obj.datatype and geometry_obj.datatype.value == WKT_LITERAL):
+                            return geometry_obj.value
             return None
         except Exception as e:
             self.logger.warning(f"Error extracting spatial extent for {dataset_uri}: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -1,35 +1,80 @@
 import os
-import psycopg2
-from typing import List
+import io
+import csv
+import threading
+from psycopg2.extensions import make_dsn
+from psycopg2.pool import ThreadedConnectionPool
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import List, Optional
 from dotenv import load_dotenv
 from models.dataset import Dataset
 from geocoder.geocoding import BoundingBox
 import logging
 
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class _PGConfig:
+    """PostgreSQL connection settings, read from the environment once at import."""
+    user: str = os.getenv("POSTGRES_USER", "postgres")
+    password: str = os.getenv("POSTGRES_PASSWORD", "postgres")
+    host: str = os.getenv("POSTGRES_HOST", "localhost")
+    port: int = int(os.getenv("POSTGRES_PORT", "5432"))
+    database: str = os.getenv("POSTGRES_DB", "spatial_data_search")
+
+
+_PG_CONFIG = _PGConfig()
+_PG_DSN = make_dsn(**asdict(_PG_CONFIG))
+
+# Process-wide connection pool, created on first use so importing this module does not connect
+_POOL_MIN_CONNECTIONS = 2
+_POOL_MAX_CONNECTIONS = 16
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait for a free connection instead
+_pool_slots = threading.BoundedSemaphore(_POOL_MAX_CONNECTIONS)
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(_POOL_MIN_CONNECTIONS, _POOL_MAX_CONNECTIONS, _PG_DSN)
+        return _pool
+
+
+def _acquire_connection():
+    """Borrow a connection from the pool, waiting while all connections are in use."""
+    _pool_slots.acquire()
+    try:
+        return _get_pool().getconn()
+    except Exception:
+        _pool_slots.release()
+        raise
+
+
+def _release_connection(connection) -> None:
+    """Return a borrowed connection to the pool; open transactions are rolled back by the pool."""
+    try:
+        _get_pool().putconn(connection)
+    finally:
+        _pool_slots.release()
+
 
 class PostGISService:
     """Service for managing DCAT metadata in PostGIS database."""
 
     def __init__(self):
-        load_dotenv()
-        self.user = os.getenv("POSTGRES_USER", "postgres")
-        self.password = os.getenv("POSTGRES_PASSWORD", "postgres")
-        self.host = os.getenv("POSTGRES_HOST", "localhost")
-        self.port = int(os.getenv("POSTGRES_PORT", "5432"))
-        self.database = os.getenv("POSTGRES_DB", "spatial_data_search")
         self.logger = logging.getLogger(__name__)
         self.connection = None
 
     def connect(self):
-        """Establish database connection."""
+        """Borrow a database connection from the connection pool."""
         try:
-            self.connection = psycopg2.connect(
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
-                database=self.database
-            )
+            self.connection = _acquire_connection()
             self.connection.autocommit = False
             self.logger.info("Connected to PostGIS database successfully.")
         except Exception as e:
@@ -37,31 +82,53 @@ class PostGISService:
             raise
 
     def disconnect(self):
-        """Close database connection."""
+        """Return the database connection to the connection pool."""
         if self.connection:
             try:
-                self.connection.close()
+                _release_connection(self.connection)
                 self.connection = None
                 self.logger.info("Disconnected from PostGIS database.")
             except Exception as e:
                 self.logger.warning(f"Error disconnecting from database: {e}")
 
-    def initialize_schema(self):
-        """Create the necessary tables and indexes."""
+    @contextmanager
+    def session(self):
+        """Hold a pooled connection for the duration of a with-block."""
+        self.connect()
+        try:
+            yield self
+        finally:
+            self.disconnect()
+
+    def initialize_schema(self, bulk_load: bool = False):
+        """
+        Create the necessary tables and indexes.
+
+        With bulk_load=True the table is made UNLOGGED and this session commits asynchronously,
+        so a harvest skips WAL writes; call finish_bulk_load() once all datasets are inserted.
+        A crash during the load can lose the table contents, which is acceptable because the
+        harvest can simply be rerun.
+        """
         if not self.connection:
             raise ValueError("No database connection established.")
 
         try:
             with self.connection.cursor() as cur:
                 # create table
-                cur.execute("""
-                    CREATE TABLE IF NOT EXISTS dcat_metadata (
+                cur.execute(f"""
+                    CREATE {"UNLOGGED " if bulk_load else ""}TABLE IF NOT EXISTS dcat_metadata (
                         dataset_id TEXT PRIMARY KEY,
                         title TEXT,
                         geom geometry(Polygon,4326)
                     );
                 """)
 
+                if bulk_load:
+                    # an existing table from an earlier harvest may still be logged
+                    cur.execute("ALTER TABLE dcat_metadata SET UNLOGGED;")
+                    cur.execute("SET synchronous_commit = off;")
+                    cur.execute("SET maintenance_work_mem = '512MB';")
+
                 # create spatial index
                 cur.execute("""
                     CREATE INDEX IF NOT EXISTS idx_dcat_metadata_geom ON dcat_metadata USING GIST (geom);
@@ -75,6 +142,44 @@ class PostGISService:
             self.logger.error(f"Failed to initialized database schema: {e}")
             raise
 
+    def cluster_spatial_index(self):
+        """Physically reorder the table along the spatial index after a bulk load, for better bbox scan locality."""
+        if not self.connection:
+            raise ValueError("No database connection established.")
+
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("CLUSTER dcat_metadata USING idx_dcat_metadata_geom;")
+                cur.execute("ANALYZE dcat_metadata;")
+            self.connection.commit()
+            self.logger.info("Clustered dcat_metadata on its spatial index.")
+        except Exception as e:
+            self.connection.rollback()
+            self.logger.warning(f"Failed to cluster dcat_metadata: {e}")
+
+    def finish_bulk_load(self):
+        """Make dcat_metadata durable again after a bulk load, restore the session settings and re-cluster the table."""
+        if not self.connection:
+            raise ValueError("No database connection established.")
+
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("ALTER TABLE dcat_metadata SET LOGGED;")
+            self.connection.commit()
+            self.logger.info("dcat_metadata is logged again after the bulk load.")
+        except Exception as e:
+            self.connection.rollback()
+            self.logger.error(f"Failed to set dcat_metadata back to LOGGED: {e}")
+            raise
+        finally:
+            # pooled connections must not keep the bulk load settings
+            with self.connection.cursor() as cur:
+                cur.execute("RESET synchronous_commit;")
+                cur.execute("RESET maintenance_work_mem;")
+            self.connection.commit()
+
+        self.cluster_spatial_index()
+
     def _insert_dataset(self, dataset:Dataset) -> bool:
         """Insert a single dataset into the database. Returns True if insert succeeded, else False"""
 
@@ -98,57 +203,141 @@ class PostGISService:
         """
         Inserts multiple datasets into the database.
 
+        The batch is streamed into a temporary staging table with COPY and moved into
+        dcat_metadata with a single INSERT ... SELECT, all in one transaction.
+        Datasets whose spatial extent is not a valid polygon are skipped up front; if the batch
+        still fails, it falls back to inserting the datasets one by one.
+
         Returns the number of datasets inserted.
         """
         if not self.connection:
             raise ValueError("No database connection established")
-        
-        inserted_count = 0
-        skipped_count = 0
 
+        valid_datasets = []
         for dataset in datasets:
-            if not dataset.spatial_extent_wkt:
-                self.logger.debug(f"Skipping {dataset.dataset_id}: no spatial extent")
-                skipped_count += 1
+            geojson = dataset.spatial_extent_geojson
+            if not geojson or geojson.get("type") != "Polygon":
+                self.logger.debug(f"Skipping {dataset.dataset_id}: no polygon spatial extent")
                 continue
+            valid_datasets.append(dataset)
+
+        rows = [
+            (dataset.dataset_id, dataset.primary_title, dataset.spatial_extent_wkt)
+            for dataset in valid_datasets
+        ]
 
-            if self._insert_dataset(dataset):
-                inserted_count += 1
-            else:
-                skipped_count += 1
+        # serialize the batch as CSV for COPY, the fastest ingestion path in PostgreSQL
+        buffer = io.StringIO()
+        csv.writer(buffer, quoting=csv.QUOTE_MINIMAL).writerows(rows)
+        buffer.seek(0)
+
+        try:
+            with self.connection.cursor() as cur:
+                cur.execute("""
+                    CREATE TEMP TABLE stage_dcat (dataset_id TEXT, title TEXT, wkt TEXT) ON COMMIT DROP;
+                """)
+                cur.copy_expert("COPY stage_dcat (dataset_id, title, wkt) FROM STDIN WITH CSV", buffer)
+                cur.execute("""
+                    INSERT INTO dcat_metadata (dataset_id, title, geom)
+                    SELECT dataset_id, title, ST_GeomFromText(wkt, 4326)
+                    FROM stage_dcat
+                    ON CONFLICT (dataset_id) DO NOTHING;
+                """)
+                inserted_count = cur.rowcount
+
+            self.connection.commit()
+
+        except Exception as e:
+            self.connection.rollback()
+            self.logger.warning(f"Batch insert failed, inserting datasets individually: {e}")
+            inserted_count = sum(self._insert_dataset(dataset) for dataset in valid_datasets)
 
         self.logger.info(
-            f"Inserted {inserted_count}/{len(datasets)} datasets. Skipped {skipped_count} datasets"
+            f"Inserted {inserted_count}/{len(datasets)} datasets. Skipped {len(datasets) - inserted_count} datasets"
         )
 
         return inserted_count
 
     def find_dataset_ids_by_bbox(self, bbox: BoundingBox) -> List[dict]:
-        """Find all datasets that intersect with a boundingbox"""
+        """
+        Find all datasets that intersect with a boundingbox.
+        Borrows its own pooled connection so concurrent requests do not share one connection.
+        """
 
-        if not self.connection:
-            raise ValueError("No database connection established")
-        
-        cur = self.connection.cursor()
-        
         try:
-            with self.connection.cursor() as cur:
+            connection = _acquire_connection()
+        except Exception as e:
+            self.logger.error(f"Failed to get a database connection: {e}")
+            raise
+
+        try:
+            with connection.cursor() as cur:
+                # the && bounding-box operator prefilters on the GIST index before the exact intersection test
                 cur.execute("""
+                    WITH envelope AS (
+                        SELECT ST_MakeEnvelope(%s, %s, %s, %s, 4326) AS geom
+                    )
                     SELECT dataset_id
-                    FROM dcat_metadata
-                    WHERE ST_Intersects(
-                        geom,
-                        ST_MakeEnvelope(%s, %s, %s, %s, 4326)
-                    );
+                    FROM dcat_metadata, envelope
+                    WHERE dcat_metadata.geom && envelope.geom
+                      AND ST_Intersects(dcat_metadata.geom, envelope.geom);
                 """, (bbox.west, bbox.south, bbox.east, bbox.north))
 
-                results = []
-                for row in cur.fetchall():
-                    results.append(row[0])
+                results = [row[0] for row in cur.fetchall()]
                 
                 self.logger.info(f"Found {len(results)} datasets intersecting with bbox")
                 return results
         
         except Exception as e:
             self.logger.error(f"Failed to query datasets by bbox: {e}")
-            return []
\ No newline at end of file
+            raise
+        finally:
+            _release_connection(connection)
+
+    def find_dataset_ids_by_bboxes(self, bboxes: List[BoundingBox]) -> List[List[str]]:
+        """
+        Find the datasets intersecting each of several bounding boxes with a single query.
+        Returns one list of dataset ids per bounding box, in input order.
+        """
+        results = [[] for _ in bboxes]
+        if not bboxes:
+            return results
+
+        try:
+            connection = _acquire_connection()
+        except Exception as e:
+            self.logger.error(f"Failed to get a database connection: {e}")
+            raise
+
+        try:
+            with connection.cursor() as cur:
+                # the bounding boxes are passed as parallel arrays and joined against the GIST index in one statement
+                cur.execute("""
+                    WITH envelopes AS (
+                        SELECT ord, ST_MakeEnvelope(west, south, east, north, 4326) AS geom
+                        FROM unnest(%s::float8[], %s::float8[], %s::float8[], %s::float8[])
+                            WITH ORDINALITY AS b(west, south, east, north, ord)
+                    )
+                    SELECT envelopes.ord, dcat_metadata.dataset_id
+                    FROM dcat_metadata
+                    JOIN envelopes
+                      ON dcat_metadata.geom && envelopes.geom
+                     AND ST_Intersects(dcat_metadata.geom, envelopes.geom);
+                """, (
+                    [bbox.west for bbox in bboxes],
+                    [bbox.south for bbox in bboxes],
+                    [bbox.east for bbox in bboxes],
+                    [bbox.north for bbox in bboxes]
+                ))
+
+                for position, dataset_id in cur.fetchall():
+                    results[position - 1].append(dataset_id)
+
+                self.logger.info(f"Found datasets intersecting {len(bboxes)} bboxes: {[len(ids) for ids in results]}")
+                return results
+
+        except Exception as e:
+            self.logger.error(f"Failed to query datasets by bboxes: {e}")
+            raise
+        finally:
+            _release_connection(connection)
\ No newline at end of file
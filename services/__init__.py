@@ -1,5 +1,6 @@
 from .retrieval_service import DatasetRetrievalService
 from .response_generator import ResponseGenerator
+from .semantic_cache import SemanticQueryCache
 from .orchestrator import RAGOrchestrator
 
-__all__ = ['DatasetRetrievalService', 'ResponseGenerator', 'RAGOrchestrator']
\ No newline at end of file
+__all__ = ['DatasetRetrievalService', 'ResponseGenerator', 'SemanticQueryCache', 'RAGOrchestrator']
\ No newline at end of file
@@ -1,12 +1,28 @@
 import os
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from parsers.query_parser import QueryParser, QueryIntent
 from services.retrieval_service import DatasetRetrievalService, SearchResult
 from geocoder.geocoding import GeocodingService, BoundingBox
 from pg_database.postgis_db import PostGISService
 from services.response_generator import ResponseGenerator
+from services.semantic_cache import SemanticQueryCache
+from vector_stores.response_cache import QdrantResponseCache
 
+# minimum relevance score of retrieved datasets, read once at import
+THRESHOLD_MIN_SCORE = float(os.getenv("THRESHOLD_MIN_SCORE", "0.0"))
+
+# resolve location filters with PostGIS polygon intersection instead of the Qdrant bbox payload filter;
+# PostGIS is also used whenever the collection was indexed without the bbox payload
+EXACT_SPATIAL_FILTER = os.getenv("EXACT_SPATIAL_FILTER", "false").lower() == "true"
+
+# answer returned when the pipeline fails; such results are flagged "fallback" so callers do not cache them
+QUERY_ERROR_ANSWER = "I encountered an error processing your query. Please try again"
+
+# shared pool for overlapping independent network calls within a query (e.g. embedding vs. geocoding and PostGIS)
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-prefetch")
 
 class RAGOrchestrator:
     """Main orchestrator that coordinates all existing services for the RAG pipeline"""
@@ -20,14 +36,28 @@ class RAGOrchestrator:
         self.retrieval_service = DatasetRetrievalService()
         self.response_generator = ResponseGenerator()
         self.postgis_service = None
-        self.min_score = float(os.getenv("THRESHOLD_MIN_SCORE"))
+        self.semantic_cache = SemanticQueryCache()
+        self.persistent_cache = None
+        self.min_score = THRESHOLD_MIN_SCORE
+        self.use_bbox_filter = False
 
     def initialize(self):
         """Initialize all services"""
         try:
             self.retrieval_service.initialize()
             self.postgis_service = PostGISService()
-            self.postgis_service.connect()
+            # verify the database is reachable; queries borrow pooled connections as needed
+            with self.postgis_service.session():
+                pass
+
+            # only filter locations in Qdrant once the collection carries the bbox payload
+            self.use_bbox_filter = not EXACT_SPATIAL_FILTER and self.retrieval_service.vector_store_manager.has_bbox_payload()
+            if not EXACT_SPATIAL_FILTER and not self.use_bbox_filter:
+                self.logger.warning("Collection has no bbox payload, filtering locations with PostGIS; re-harvest to filter in Qdrant")
+
+            # responses cached in Qdrant survive restarts and are shared between worker processes
+            self.persistent_cache = QdrantResponseCache(self.retrieval_service.vector_store_manager.client)
+            self.persistent_cache.purge_expired()
 
             self.logger.info("RAG Orchestrator initialized successfully")
         except Exception as e:
@@ -40,66 +70,325 @@ class RAGOrchestrator:
             Returns a dictionary with answer and the retrived datasets
         """
         try:
-            # step 1 - Parse the query using the query parser
+            # step 0 - Serve near-duplicate queries from the semantic cache
             self.logger.info(f"Processing query: {user_query}")
+            query_embedding = self.retrieval_service.vector_store_manager.embeddings.embed_query(user_query)
+            cached_result = self._get_cached_response(query_embedding, max_results)
+            if cached_result is not None:
+                return cached_result
+
+            # step 1 - Parse the query using the query parser
             parsed_query = self.query_parser.parse(user_query)
 
             # step 2 - Route the query based on whether a location is mentioned
             if parsed_query.has_location:
-                result = self._process_location_based_query(parsed_query, user_query, max_results)
+                result = self._process_location_based_query(parsed_query, user_query, max_results, query_embedding)
             else:
-                result = self._process_semantic_only_query(parsed_query, user_query, max_results)
+                result = self._process_semantic_only_query(parsed_query, user_query, max_results, query_embedding)
             
+            self._cache_response(query_embedding, max_results, result)
             return result
         
         except Exception as e:
             self.logger.error(f"Error processing query: {e}")
             return {
-                "answer": "I encountered an error processing your query. Please try again",
-                "source_datasets": []
+                "answer": QUERY_ERROR_ANSWER,
+                "source_datasets": [],
+                "fallback": True
             }
         
-    def _process_location_based_query(self, parsed_query: QueryIntent, original_query, max_results: int) -> Dict[str, Any]:
-        """Process queries that mention specific locations"""
-        self.logger.info("Processing location-based query")
-
-        # geocode location
-        location = parsed_query.locations[0]
-        bounding_box = self.geocoder.get_bounding_box(location)
+    async def aprocess_query(self, user_query: str, max_results: int=3) -> Dict[str, Any]:
+        """
+            Async variant of process_query: LLM and embedding calls are awaited and the blocking
+            geocoding and PostGIS calls run in worker threads, so one event loop can interleave many queries.
+            Returns a dictionary with answer and the retrived datasets
+        """
+        try:
+            # step 0 - Serve near-duplicate queries from the semantic cache
+            self.logger.info(f"Processing query: {user_query}")
+            query_embedding = await self.retrieval_service.vector_store_manager.embeddings.aembed_query(user_query)
+            cached_result = await asyncio.to_thread(self._get_cached_response, query_embedding, max_results)
+            if cached_result is not None:
+                return cached_result
 
-        if not bounding_box:
-            self.logger.warning("No valid bounding box found")
+            # steps 1 and 2 - Parse the query and retrieve the matching datasets
+            parsed_query, search_results = await self._aretrieve(user_query, query_embedding, max_results)
 
-            # generate response
-            response = self.response_generator.generate_response(
-                original_query=original_query,
-                search_results=[],
+            # step 3 - Generate the response
+            result = await self.response_generator.agenerate_response(
+                original_query=user_query,
+                search_results=search_results,
                 query_language=parsed_query.language
             )
-            return response
-        
-        # query postgis for datasets intersecting with the bounding box
-        dataset_ids = self.postgis_service.find_dataset_ids_by_bbox(bounding_box)
 
-        if len(dataset_ids) == 0:
-            self.logger.info("No datasets intersect with the query bounding box")
+            await asyncio.to_thread(self._cache_response, query_embedding, max_results, result)
+            return result
+
+        except Exception as e:
+            self.logger.error(f"Error processing query: {e}")
+            return {
+                "answer": QUERY_ERROR_ANSWER,
+                "source_datasets": [],
+                "fallback": True
+            }
+
+    async def astream_query(self, user_query: str, max_results: int=3) -> AsyncIterator[Tuple[str, Any]]:
+        """
+            Stream the RAG pipeline result: yields ("token", text) for each answer chunk as the LLM produces it,
+            then ("sources", source_datasets) once the answer is complete.
+        """
+        try:
+            self.logger.info(f"Streaming query: {user_query}")
+            query_embedding = await self.retrieval_service.vector_store_manager.embeddings.aembed_query(user_query)
+            cached_result = await asyncio.to_thread(self._get_cached_response, query_embedding, max_results)
+            if cached_result is not None:
+                yield "token", cached_result["answer"]
+                yield "sources", cached_result["source_datasets"]
+                return
 
-            # generate response
-            response = self.response_generator.generate_response(
-                original_query=original_query,
-                search_results=[],
+            parsed_query, search_results = await self._aretrieve(user_query, query_embedding, max_results)
+        except Exception as e:
+            self.logger.error(f"Error processing query: {e}")
+            yield "token", QUERY_ERROR_ANSWER
+            yield "sources", []
+            return
+
+        # each chunk is handed on as soon as it arrives, without buffering the answer
+        chunks = []
+        try:
+            async for chunk in self.response_generator.astream_response(
+                original_query=user_query,
+                search_results=search_results,
                 query_language=parsed_query.language
+            ):
+                chunks.append(chunk)
+                yield "token", chunk
+        except Exception:
+            # the stream broke partway: finish with the fallback text and keep the partial answer out of the caches
+            fallback = self.response_generator.fallback_response(search_results)
+            yield "token", fallback["answer"]
+            yield "sources", fallback["source_datasets"]
+            return
+
+        result = {
+            "answer": "".join(chunks),
+            "source_datasets": self.response_generator.format_sources(search_results)
+        }
+        yield "sources", result["source_datasets"]
+        await asyncio.to_thread(self._cache_response, query_embedding, max_results, result)
+
+    async def _aretrieve(self, user_query: str, query_embedding: List[float], max_results: int) -> Tuple[QueryIntent, List[SearchResult]]:
+        """Parse the query and retrieve the datasets matching it, routing on whether a location is mentioned"""
+        parsed_query = await self.query_parser.aparse(user_query)
+        search_query = parsed_query.search_query or user_query
+
+        async def embed_search_query() -> List[float]:
+            if search_query == user_query:
+                return query_embedding
+            return await self.retrieval_service.vector_store_manager.embeddings.aembed_query(search_query)
+
+        async def find_bounding_box() -> Optional[BoundingBox]:
+            return await asyncio.to_thread(self.geocoder.get_bounding_box, parsed_query.locations[0])
+
+        if parsed_query.has_location:
+            self.logger.info("Processing location-based query")
+            # the search embedding does not depend on the location lookup, so both run concurrently
+            search_vector, bounding_box = await asyncio.gather(embed_search_query(), find_bounding_box())
+            if not bounding_box:
+                return parsed_query, []
+            if self.use_bbox_filter:
+                search_results = await self.retrieval_service.asearch_by_bbox(
+                    query=search_query,
+                    bounding_box=bounding_box,
+                    max_results=max_results,
+                    min_score=self.min_score,
+                    query_vector=search_vector
+                )
+                return parsed_query, search_results
+            dataset_ids = await asyncio.to_thread(self.postgis_service.find_dataset_ids_by_bbox, bounding_box)
+            if not dataset_ids:
+                return parsed_query, []
+            search_results = await self.retrieval_service.asearch_by_dataset_ids(
+                query=search_query,
+                dataset_ids=dataset_ids,
+                max_results=max_results,
+                min_score=self.min_score,
+                query_vector=search_vector
             )
-            return response
-        
-        # perform filtered semantic search
-        search_query = " ".join(parsed_query.core_search_terms)
-        search_results = self.retrieval_service.search_by_dataset_ids(
-            query=search_query,
-            dataset_ids=dataset_ids,
-            max_results=max_results,
-            min_score=self.min_score
-        )
+        else:
+            self.logger.info("Processing semantic-only query")
+            search_results = await self.retrieval_service.asearch_all_embeddings(
+                query=search_query,
+                max_results=max_results,
+                min_score=self.min_score,
+                query_vector=await embed_search_query()
+            )
+        return parsed_query, search_results
+
+    def process_queries(self, user_queries: List[str], max_results: int=3) -> List[Dict[str, Any]]:
+        """
+            Process several user queries through the RAG pipeline, batching each stage:
+            one embeddings request, concurrent query parsing, Qdrant bbox filters (or one PostGIS query for all bounding boxes),
+            one Qdrant batch search and batched response generation.
+            Returns one dictionary with answer and the retrieved datasets per query, in input order
+        """
+        error_result = {"answer": QUERY_ERROR_ANSWER, "source_datasets": [], "fallback": True}
+        results: List[Optional[Dict[str, Any]]] = [None] * len(user_queries)
+        if not user_queries:
+            return []
+
+        try:
+            # step 0 - Serve near-duplicate queries from the semantic cache
+            self.logger.info(f"Processing batch of {len(user_queries)} queries")
+            query_embeddings = self.retrieval_service.vector_store_manager.embeddings.embed_documents(user_queries)
+            pending = []
+            for i, query_embedding in enumerate(query_embeddings):
+                results[i] = self._get_cached_response(query_embedding, max_results)
+                if results[i] is None:
+                    pending.append(i)
+
+            # step 1 - Parse the remaining queries concurrently
+            parsed_queries = dict(zip(pending, self.query_parser.parse_batch([user_queries[i] for i in pending])))
+            for i, parsed_query in list(parsed_queries.items()):
+                if isinstance(parsed_query, Exception):
+                    results[i] = error_result
+                    del parsed_queries[i]
+
+            # step 2 - Geocode location-based queries; with exact spatial filtering, look up all bounding boxes in one PostGIS query
+            bounding_boxes = {}
+            for i, parsed_query in list(parsed_queries.items()):
+                if not parsed_query.has_location:
+                    continue
+                try:
+                    bounding_boxes[i] = self.geocoder.get_bounding_box(parsed_query.locations[0])
+                except Exception as e:
+                    # a geocoding outage fails only this query, with an uncached error result
+                    self.logger.error(f"Error geocoding query: {e}")
+                    results[i] = error_result
+                    del parsed_queries[i]
+            located = [i for i, bounding_box in bounding_boxes.items() if bounding_box]
+            if not self.use_bbox_filter:
+                dataset_ids = dict(zip(located, self.postgis_service.find_dataset_ids_by_bboxes([bounding_boxes[i] for i in located])))
+                searchable = [i for i in parsed_queries if i not in bounding_boxes or dataset_ids.get(i)]
+                bbox_filters = {}
+            else:
+                dataset_ids = {}
+                searchable = [i for i in parsed_queries if i not in bounding_boxes or bounding_boxes[i]]
+                bbox_filters = {i: bounding_boxes[i] for i in located}
+
+            # step 3 - Run all semantic searches in one batch; location-based queries without matching datasets skip the search
+            search_queries = [
+                parsed_queries[i].search_query or user_queries[i]
+                for i in searchable
+            ]
+            search_results = dict(zip(searchable, self.retrieval_service.search_batch(
+                queries=search_queries,
+                dataset_ids=[dataset_ids.get(i) for i in searchable],
+                max_results=max_results,
+                min_score=self.min_score,
+                bounding_boxes=[bbox_filters.get(i) for i in searchable]
+            )))
+
+            # step 4 - Generate all responses, several queries per LLM request
+            answered = list(parsed_queries)
+            responses = self.response_generator.generate_responses_batch([
+                (user_queries[i], parsed_queries[i].language, search_results.get(i, []))
+                for i in answered
+            ])
+            for i, response in zip(answered, responses):
+                results[i] = response
+                self._cache_response(query_embeddings[i], max_results, response)
+
+            return results
+
+        except Exception as e:
+            self.logger.error(f"Error processing queries: {e}")
+            return [result if result is not None else error_result for result in results]
+
+    def _get_cached_response(self, query_embedding: List[float], max_results: int) -> Optional[Dict[str, Any]]:
+        """Look up a response for a similar query, first in memory and then in the persistent Qdrant cache"""
+        cached_result = self.semantic_cache.get(query_embedding, max_results)
+        if cached_result is not None or self.persistent_cache is None:
+            return cached_result
+
+        try:
+            cached_result = self.persistent_cache.get(query_embedding, max_results)
+        except Exception as e:
+            self.logger.warning(f"Persistent cache lookup failed: {e}")
+            return None
+        if cached_result is not None:
+            self.semantic_cache.put(query_embedding, max_results, cached_result)
+        return cached_result
+
+    def _cache_response(self, query_embedding: List[float], max_results: int, result: Dict[str, Any]) -> None:
+        """Store a response in both the in-memory and the persistent cache.
+           Fallback responses from a failed generation are not cached, so near-duplicate queries retry."""
+        if result.get("fallback"):
+            return
+
+        self.semantic_cache.put(query_embedding, max_results, result)
+        if self.persistent_cache is None:
+            return
+
+        try:
+            self.persistent_cache.put(query_embedding, max_results, result)
+        except Exception as e:
+            self.logger.warning(f"Persistent cache write failed: {e}")
+
+    def _process_location_based_query(self, parsed_query: QueryIntent, original_query, max_results: int,
+                                      query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
+        """Process queries that mention specific locations"""
+        self.logger.info("Processing location-based query")
+
+        # embed the search query in the background while geocoding and PostGIS run
+        search_query = parsed_query.search_query
+        if search_query != original_query or query_embedding is None:
+            search_vector_future = _PREFETCH_POOL.submit(self.retrieval_service.vector_store_manager.embeddings.embed_query, search_query)
+        else:
+            search_vector_future = None
+        search_vector_used = False
+
+        try:
+            # geocode location
+            location = parsed_query.locations[0]
+            bounding_box = self.geocoder.get_bounding_box(location)
+
+            if not bounding_box:
+                self.logger.warning("No valid bounding box found")
+                search_results = []
+
+            # filter on the bbox payload in Qdrant, skipping the PostGIS round trip
+            elif self.use_bbox_filter:
+                search_vector_used = True
+                search_results = self.retrieval_service.search_by_bbox(
+                    query=search_query,
+                    bounding_box=bounding_box,
+                    max_results=max_results,
+                    min_score=self.min_score,
+                    query_vector=self._prefetched_vector(search_vector_future, query_embedding)
+                )
+
+            else:
+                # query postgis for datasets intersecting with the bounding box
+                dataset_ids = self.postgis_service.find_dataset_ids_by_bbox(bounding_box)
+
+                if len(dataset_ids) == 0:
+                    self.logger.info("No datasets intersect with the query bounding box")
+                    search_results = []
+                else:
+                    # perform filtered semantic search
+                    search_vector_used = True
+                    search_results = self.retrieval_service.search_by_dataset_ids(
+                        query=search_query,
+                        dataset_ids=dataset_ids,
+                        max_results=max_results,
+                        min_score=self.min_score,
+                        query_vector=self._prefetched_vector(search_vector_future, query_embedding)
+                    )
+        finally:
+            # without a search the prefetched embedding is unused: cancel it, or log its failure if it already runs
+            if search_vector_future is not None and not search_vector_used and not search_vector_future.cancel():
+                search_vector_future.add_done_callback(self._log_prefetch_error)
 
         # generate response
         response = self.response_generator.generate_response(
@@ -110,15 +399,27 @@ class RAGOrchestrator:
 
         return response
 
-    def _process_semantic_only_query(self, parsed_query: QueryIntent, original_query, max_results: int) -> Dict[str, Any]:
+    @staticmethod
+    def _prefetched_vector(search_vector_future: Optional[Future], query_embedding: Optional[List[float]]) -> List[float]:
+        """Wait for the prefetched search embedding, or reuse the query embedding when none was needed"""
+        return search_vector_future.result() if search_vector_future else query_embedding
+
+    def _log_prefetch_error(self, future: Future) -> None:
+        """Log the failure of a prefetched embedding whose result is never read"""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.warning(f"Prefetched embedding failed: {future.exception()}")
+
+    def _process_semantic_only_query(self, parsed_query: QueryIntent, original_query, max_results: int,
+                                     query_embedding: Optional[List[float]] = None) -> Dict[str, Any]:
         """Process queries without specific location mentions"""
         self.logger.info("Processing semantic-only query")
 
-        search_query = " ".join(parsed_query.core_search_terms) if parsed_query.core_search_terms else original_query
+        search_query = parsed_query.search_query or original_query
         search_results = self.retrieval_service.search_all_embeddings(
             query=search_query,
             max_results=max_results,
-            min_score=self.min_score
+            min_score=self.min_score,
+            query_vector=query_embedding if search_query == original_query else None
         )
 
         # generate response
@@ -1,39 +1,112 @@
-from typing import List, Dict, Any
+import hashlib
+import json
+from functools import lru_cache
+from threading import Lock
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+from cachetools import TTLCache
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel, Field
+from parsers.query_parser import get_openai_http_clients
 from services.retrieval_service import SearchResult
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Generated answers are reused for an hour for the same query and set of datasets
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 3600
+# Maximum number of queries packed into a single batched LLM request
+BATCH_PROMPT_SIZE = 10
+
+RESPONSE_SYSTEM_PROMPT = """You are a helpful assistant for a spatial data search system.
+     Based on the user's query and the retrieved datasets, provide a consise, informative response.
+     
+     Guidelines:
+     - Directly address the user's query.
+     - Recommend the most relevant datasets.
+     - Mention location context if applicable.
+     - When recommending datasets, use the titles as provided, do not translate the title.
+     - Be helpful and specific."""
+
+# response generation prompt: the system message is built once at import and only the human text is formatted per call
+RESPONSE_SYSTEM_MESSAGE = SystemMessage(content=RESPONSE_SYSTEM_PROMPT)
+
+# the dataset block precedes the per-query text so requests over overlapping datasets share a cacheable prompt prefix
+RESPONSE_HUMAN_TEMPLATE = """Retrieved Datasets: {datasets_info}
+      
+      Relevance: {relevance_info}
+      
+      User Query: {original_query}
+      
+      Always respond in {query_language} language"""
+
+
+def _build_response_messages(inputs: Dict[str, str]) -> List[BaseMessage]:
+    """Combine the prebuilt system message with the formatted human message, without a prompt template"""
+    return [RESPONSE_SYSTEM_MESSAGE, HumanMessage(content=RESPONSE_HUMAN_TEMPLATE.format(**inputs))]
+
+# prompt answering several queries in one request; the system prompt is sent once for all of them
+BATCH_RESPONSE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", RESPONSE_SYSTEM_PROMPT + """
+     
+     You will receive several requests as a JSON list. Answer every request separately,
+     each in the language given by its query_language, and return the answers with the id of their request."""),
+
+     ("human", """Requests: {requests}""")
+])
+
+
+class BatchAnswer(BaseModel):
+    """Answer to one request of a batched prompt."""
+    id: int = Field(description="id of the request being answered")
+    answer: str = Field(description="Response to the request")
+
+
+class BatchAnswers(BaseModel):
+    """Answers to all requests of a batched prompt."""
+    answers: List[BatchAnswer]
+
+
+@lru_cache(maxsize=1)
+def _get_llm() -> ChatOpenAI:
+    """Return the shared ChatOpenAI model; it reuses the pooled OpenAI HTTP clients."""
+    http_client, http_async_client = get_openai_http_clients()
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.3,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+@lru_cache(maxsize=1)
+def _get_response_chain() -> Runnable:
+    """Return the shared response chain."""
+    return RunnableLambda(_build_response_messages) | _get_llm() | StrOutputParser()
+
+@lru_cache(maxsize=1)
+def _get_batch_response_chain() -> Runnable:
+    """Return the shared chain answering a packed list of requests with structured output."""
+    return BATCH_RESPONSE_PROMPT | _get_llm().with_structured_output(BatchAnswers, method="json_schema")
+
 
 class ResponseGenerator:
     """Generates natural language responses using Langchain based on retrieved datasets."""
 
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
-        self.logger = logging.getLogger(__name__)
-
-        # response generation prompt
-        self.prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a helpful assistant for a spatial data search system.
-             Based on the user's query and the retrieved datasets, provide a consise, informative response.
-             
-             Guidelines:
-             - Directly address the user's query.
-             - Recommend the most relevant datasets.
-             - Mention location context if applicable.
-             - When recommending datasets, use the titles as provided, do not translate the title.
-             - Be helpful and specific."""),
-
-             ("human", """User Query: {original_query}
-              
-              Retrieved Datasets: {datasets_info}
-              
-              Always respond in {query_language} language""")
-        ])
-
-        # create the chain
-        self.chain = self.prompt | self.llm | StrOutputParser()
+        self.logger = logger
+
+        # answers keyed by (query, language, dataset ids), shared across worker threads
+        self._response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+        self._response_cache_lock = Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        self.chain = _get_response_chain()
+        self.batch_chain = _get_batch_response_chain()
 
     def generate_response(self, original_query: str, query_language: str, search_results: List[SearchResult]) -> Dict[str, Any]:
         """
@@ -48,17 +121,15 @@ class ResponseGenerator:
         """
 
         try:
-            # format datasets for the prompt
-            datasets_info = self._format_datasets_for_prompt(search_results)
-
-            # generate response using Langchain
-            response_text = self.chain.invoke({
-                "original_query": original_query,
-                "datasets_info": datasets_info,
-                "query_language": query_language
-            })
+            cache_key = self._response_cache_key(original_query, query_language, search_results)
+            response_text = self._get_cached_response(cache_key)
 
-            # format source datasets for the API response
+            if response_text is None:
+                # generate response using Langchain
+                response_text = self.chain.invoke(self._chain_input(original_query, query_language, search_results))
+                self._cache_response(cache_key, response_text)
+
+            # format source datasets from the live results so the metadata stays fresh
             formatted_datasets = self._format_datasets_for_response(search_results)
 
             return {
@@ -68,22 +139,202 @@ class ResponseGenerator:
         
         except Exception as e:
             self.logger.error(f"Error generating response: {e}")
+            return self.fallback_response(search_results)
+
+    async def agenerate_response(self, original_query: str, query_language: str, search_results: List[SearchResult]) -> Dict[str, Any]:
+        """
+        Async variant of generate_response that awaits the LLM call instead of blocking a worker thread.
+
+        Returns:
+            Dictionary with generated response and formatted datasets.
+        """
+
+        try:
+            cache_key = self._response_cache_key(original_query, query_language, search_results)
+            response_text = self._get_cached_response(cache_key)
+
+            if response_text is None:
+                response_text = await self.chain.ainvoke(self._chain_input(original_query, query_language, search_results))
+                self._cache_response(cache_key, response_text)
+
             return {
-                "answer": f"I found {len(search_results)} datsasets related to your query, but could not generate a detailed response.",
+                "answer": response_text,
                 "source_datasets": self._format_datasets_for_response(search_results)
             }
+
+        except Exception as e:
+            self.logger.error(f"Error generating response: {e}")
+            return self.fallback_response(search_results)
+
+    async def astream_response(self, original_query: str, query_language: str, search_results: List[SearchResult]) -> AsyncIterator[str]:
+        """
+        Stream the generated response text chunk by chunk as the LLM produces it.
+        The complete answer is cached once the stream finishes; if generation fails partway, the error is raised
+        after the chunks already yielded, so callers can tell an incomplete answer from a finished one.
+        """
+
+        cache_key = self._response_cache_key(original_query, query_language, search_results)
+        response_text = self._get_cached_response(cache_key)
+        if response_text is not None:
+            yield response_text
+            return
+
+        chunks = []
+        try:
+            async for chunk in self.chain.astream(self._chain_input(original_query, query_language, search_results)):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            self.logger.error(f"Error streaming response: {e}")
+            raise
+        self._cache_response(cache_key, "".join(chunks))
         
+    def generate_responses(self, requests: List[Tuple[str, str, List[SearchResult]]]) -> List[Dict[str, Any]]:
+        """
+        Generate responses for several (original_query, query_language, search_results) requests.
+        Cached answers are reused and the remaining LLM calls run concurrently through the chain's batch interface.
+
+        Returns:
+            One dictionary with generated response and formatted datasets per request, in input order.
+        """
+
+        cache_keys = [self._response_cache_key(*request) for request in requests]
+        response_texts = [self._get_cached_response(cache_key) for cache_key in cache_keys]
+        pending = [i for i, response_text in enumerate(response_texts) if response_text is None]
+
+        if pending:
+            generated = self.chain.batch([self._chain_input(*requests[i]) for i in pending], return_exceptions=True)
+
+            for i, response_text in zip(pending, generated):
+                if isinstance(response_text, Exception):
+                    self.logger.error(f"Error generating response: {response_text}")
+                    continue
+                self._cache_response(cache_keys[i], response_text)
+                response_texts[i] = response_text
+
+        responses = []
+        for (_, _, search_results), response_text in zip(requests, response_texts):
+            if response_text is None:
+                responses.append(self.fallback_response(search_results))
+                continue
+            responses.append({
+                "answer": response_text,
+                "source_datasets": self._format_datasets_for_response(search_results)
+            })
+        return responses
+
+    def generate_responses_batch(self, requests: List[Tuple[str, str, List[SearchResult]]]) -> List[Dict[str, Any]]:
+        """
+        Generate responses for several (original_query, query_language, search_results) requests,
+        packing up to BATCH_PROMPT_SIZE uncached requests into each LLM call with a structured list of answers.
+        Requests the model leaves unanswered fall back to individual calls.
+
+        Returns:
+            One dictionary with generated response and formatted datasets per request, in input order.
+        """
+
+        cache_keys = [self._response_cache_key(*request) for request in requests]
+        response_texts = [self._get_cached_response(cache_key) for cache_key in cache_keys]
+        pending = [i for i, response_text in enumerate(response_texts) if response_text is None]
+
+        groups = [pending[start:start + BATCH_PROMPT_SIZE] for start in range(0, len(pending), BATCH_PROMPT_SIZE)]
+        packed_inputs = [
+            {"requests": json.dumps([
+                {"id": i, **self._chain_input(*requests[i])}
+                for i in group
+            ], ensure_ascii=False)}
+            for group in groups
+        ]
+        for group, result in zip(groups, self.batch_chain.batch(packed_inputs, return_exceptions=True)):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error generating batched responses: {result}")
+                continue
+            answers = {answer.id: answer.answer for answer in result.answers}
+            for i in group:
+                if i in answers:
+                    self._cache_response(cache_keys[i], answers[i])
+                    response_texts[i] = answers[i]
+
+        unanswered = [i for i in pending if response_texts[i] is None]
+        fallback_responses = dict(zip(unanswered, self.generate_responses([requests[i] for i in unanswered])))
+
+        responses = []
+        for i, ((_, _, search_results), response_text) in enumerate(zip(requests, response_texts)):
+            if response_text is None:
+                responses.append(fallback_responses[i])
+                continue
+            responses.append({
+                "answer": response_text,
+                "source_datasets": self._format_datasets_for_response(search_results)
+            })
+        return responses
+
+    def format_sources(self, search_results: List[SearchResult]) -> List[Dict[str, Any]]:
+        """Format the source datasets of a streamed response for the API"""
+        return self._format_datasets_for_response(search_results)
+
+    def _chain_input(self, original_query: str, query_language: str, search_results: List[SearchResult]) -> Dict[str, str]:
+        """Build the prompt variables for a single response"""
+        return {
+            "datasets_info": self._format_datasets_for_prompt(search_results),
+            "relevance_info": self._format_relevance_for_prompt(search_results),
+            "original_query": original_query,
+            "query_language": query_language
+        }
+
+    def fallback_response(self, search_results: List[SearchResult]) -> Dict[str, Any]:
+        """Response returned when the LLM call fails, flagged so callers do not cache it"""
+        return {
+            "answer": f"I found {len(search_results)} datsasets related to your query, but could not generate a detailed response.",
+            "source_datasets": self._format_datasets_for_response(search_results),
+            "fallback": True
+        }
+
+    def _get_cached_response(self, cache_key: bytes) -> Optional[str]:
+        """Look up a cached answer and update the hit/miss counters"""
+        with self._response_cache_lock:
+            response_text = self._response_cache.get(cache_key)
+            if response_text is None:
+                self.cache_misses += 1
+            else:
+                self.cache_hits += 1
+                self.logger.info(f"Response cache hit ({self.cache_hits} hits, {self.cache_misses} misses)")
+            return response_text
+
+    def _cache_response(self, cache_key: bytes, response_text: str) -> None:
+        with self._response_cache_lock:
+            self._response_cache[cache_key] = response_text
+
+    def _response_cache_key(self, original_query: str, query_language: str, search_results: List[SearchResult]) -> bytes:
+        """Build a compact cache key from the query, the answer language and the sorted dataset ids"""
+        dataset_ids = ",".join(sorted(result.dataset_id for result in search_results))
+        return hashlib.blake2b(f"{original_query}|{query_language}|{dataset_ids}".encode()).digest()
+
     def _format_datasets_for_prompt(self, search_results: List[SearchResult]) -> str:
-        """Format datasets for inclusion in the LLM prompt"""
+        """
+        Format datasets for inclusion in the LLM prompt.
+        Datasets are sorted by id and their content normalized, so the same datasets always render identically
+        regardless of the query; query-specific scores are kept out of this block.
+        """
         if not search_results:
             return "No datasets found"
         
         formatted = []
-        for i, result in enumerate(search_results, 1):
-            score_info = f" (Relevance: {result.score})" if result.score else ""
-            formatted.append(f"{i}. Dataset ID: {result.dataset_id} {score_info} \n Content: {result.content}")
+        for result in sorted(search_results, key=lambda result: result.dataset_id):
+            content = "\n".join(line.strip() for line in result.content.strip().splitlines() if line.strip())
+            formatted.append(f"Dataset ID: {result.dataset_id}\nContent: {content}")
         
         return "\n\n".join(formatted)
+
+    def _format_relevance_for_prompt(self, search_results: List[SearchResult]) -> str:
+        """Format the query-specific relevance ranking of the datasets for the LLM prompt"""
+        if not search_results:
+            return "None"
+
+        return "\n".join(
+            f"{i}. Dataset ID: {result.dataset_id}" + (f" (Relevance: {result.score})" if result.score else "")
+            for i, result in enumerate(search_results, 1)
+        )
     
     def _format_datasets_for_response(self, search_results: List[SearchResult]) -> List[Dict[str, Any]]:
         """Format datasets for API response."""
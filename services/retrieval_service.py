@@ -1,13 +1,50 @@
 import os
 import logging
-from typing import List, Optional, Set
+from functools import lru_cache
+from threading import Lock
+from cachetools import LRUCache
+from typing import List, Optional
 from dataclasses import dataclass
 from langchain.schema import Document
 from qdrant_client import models
 from dotenv import load_dotenv
-from vector_stores.qdrant_store import QdrantVectorStoreManager
+from vector_stores.qdrant_store import QdrantVectorStoreManager, BBOX_PAYLOAD_KEY
+from geocoder.geocoding import BoundingBox
+from vector_stores.cached_embeddings import CachedEmbeddings
 
-@dataclass
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Number of dataset id filters kept for reuse, keyed by the set of ids
+FILTER_CACHE_SIZE = 256
+
+# Payload metadata fields the API and frontend actually use; the rest of the payload is not kept per result
+RESULT_METADATA_KEYS = (
+    "title",
+    "description",
+    "keywords",
+    "access_urls",
+    "spatial_extent",
+    "spatial_extent_geojson",
+    "spatial_extent_bounds",
+)
+
+
+def _compact_metadata(metadata: dict) -> dict:
+    """Keep only the used metadata fields; the keys come from RESULT_METADATA_KEYS, so all results share the same key strings"""
+    return {key: metadata[key] for key in RESULT_METADATA_KEYS if key in metadata}
+
+
+@lru_cache(maxsize=1)
+def get_vector_store_manager() -> QdrantVectorStoreManager:
+    """Return the process-wide vector store manager, so every service shares one Qdrant client."""
+    vector_store_manager = QdrantVectorStoreManager()
+    # repeated query texts reuse their embedding across searches and the semantic cache probe
+    vector_store_manager.embeddings = CachedEmbeddings(vector_store_manager.embeddings)
+    return vector_store_manager
+
+@dataclass(slots=True, frozen=True)
 class SearchResult:
     """Represents a search result with metadata"""
     dataset_id: str
@@ -15,6 +52,17 @@ class SearchResult:
     score: Optional[float] = None
     metadata: Optional[dict] = None
 
+    @classmethod
+    def from_point(cls, point: models.ScoredPoint) -> 'SearchResult':
+        """Create a SearchResult straight from a Qdrant point stored in the langchain payload layout"""
+        metadata = point.payload.get('metadata') or {}
+        return cls(
+            dataset_id=metadata.get('dataset_id', ''),
+            content=point.payload.get('page_content', ''),
+            score=point.score,
+            metadata=_compact_metadata(metadata)
+        )
+
     @classmethod
     def from_documents(cls, document: Document, score: Optional[float] = None) -> 'SearchResult':
         """Create a SearchResult from a Document"""
@@ -22,7 +70,7 @@ class SearchResult:
             dataset_id=document.metadata.get('dataset_id', ''),
             content=document.page_content,
             score=score,
-            metadata=document.metadata
+            metadata=_compact_metadata(document.metadata)
         )
     
 
@@ -30,12 +78,15 @@ class DatasetRetrievalService:
     """Service for retriving datasets from a vector store"""
 
     def __init__(self):
-        load_dotenv()
-        self.logger = logging.getLogger(__name__)
+        self.logger = logger
 
-        self.vector_store_manager = QdrantVectorStoreManager()
+        self.vector_store_manager = get_vector_store_manager()
         self._initialized = False
 
+        # the same bounding box yields the same dataset ids, so their filter is built once
+        self._filter_cache = LRUCache(maxsize=FILTER_CACHE_SIZE)
+        self._filter_cache_lock = Lock()
+
     def initialize(self):
         """Initialize the retrival service"""
         if not self._initialized:
@@ -43,75 +94,179 @@ class DatasetRetrievalService:
             self._initialized = True
             self.logger.info("DatasetRetrievalService initialized successfully.")
 
-    def search_by_dataset_ids(self, query: str, dataset_ids: List[str], max_results: int = 10, min_score: float = 0.0) -> List[SearchResult]:
+    def search_by_dataset_ids(self, query: str, dataset_ids: List[str], max_results: int = 10, min_score: float = 0.0,
+                              query_vector: Optional[List[float]] = None) -> List[SearchResult]:
 
-        """Perfom semantic similarity search limited to specific vector embeddings by their dataset_ids"""
-        if not self._initialized:
-                self.initialize()
+        """Perfom semantic similarity search limited to specific vector embeddings by their dataset_ids.
+           Pass query_vector to reuse an embedding of the query that was already computed."""
+        self.logger.info(f"Searching vector store with dataset IDs, min_score: {min_score}")
+        return self._search(query, query_vector, max_results, min_score, self._build_dataset_id_filter(dataset_ids))
+
+    def search_by_bbox(self, query: str, bounding_box: BoundingBox, max_results: int = 10, min_score: float = 0.0,
+                       query_vector: Optional[List[float]] = None) -> List[SearchResult]:
+        """Perform semantic similarity search limited to datasets whose extent envelope intersects the bounding box.
+           The spatial filter is evaluated by Qdrant on the indexed bbox payload, so no PostGIS lookup is needed."""
+        self.logger.info(f"Searching vector store within bounding box, min_score: {min_score}")
+        return self._search(query, query_vector, max_results, min_score, self._build_bbox_filter(bounding_box))
+
+    def search_all_embeddings(self, query: str, max_results: int = 5, min_score: float = 0.0,
+                              query_vector: Optional[List[float]] = None) -> List[SearchResult]:
+        """Perform semantic similarity search across all vector embeddings: no filtering.
+           Pass query_vector to reuse an embedding of the query that was already computed."""
+        self.logger.info(f"Searching all embeddings with min_score: {min_score}")
+        return self._search(query, query_vector, max_results, min_score)
 
-        filter_criteria = self._build_dataset_id_filter(dataset_ids)
+    async def asearch_by_dataset_ids(self, query: str, dataset_ids: List[str], max_results: int = 10, min_score: float = 0.0,
+                                     query_vector: Optional[List[float]] = None) -> List[SearchResult]:
+        """Async variant of search_by_dataset_ids using the async gRPC Qdrant client"""
         self.logger.info(f"Searching vector store with dataset IDs, min_score: {min_score}")
+        return await self._search_async(query, query_vector, max_results, min_score, self._build_dataset_id_filter(dataset_ids))
+
+    async def asearch_by_bbox(self, query: str, bounding_box: BoundingBox, max_results: int = 10, min_score: float = 0.0,
+                              query_vector: Optional[List[float]] = None) -> List[SearchResult]:
+        """Async variant of search_by_bbox using the async gRPC Qdrant client"""
+        self.logger.info(f"Searching vector store within bounding box, min_score: {min_score}")
+        return await self._search_async(query, query_vector, max_results, min_score, self._build_bbox_filter(bounding_box))
+
+    async def asearch_all_embeddings(self, query: str, max_results: int = 5, min_score: float = 0.0,
+                                     query_vector: Optional[List[float]] = None) -> List[SearchResult]:
+        """Async variant of search_all_embeddings using the async gRPC Qdrant client"""
+        self.logger.info(f"Searching all embeddings with min_score: {min_score}")
+        return await self._search_async(query, query_vector, max_results, min_score)
+
+    def _search(self, query: str, query_vector: Optional[List[float]], max_results: int, min_score: float,
+                filter_criteria: Optional[models.Filter] = None) -> List[SearchResult]:
+        """Embed the query once (unless a vector is given) and search Qdrant with the vector directly.
+           Errors are logged and re-raised, so a failed search is not mistaken for one without matches."""
+
+        if not self._initialized:
+            self.initialize()
+
+        try:
+            if query_vector is None:
+                query_vector = self.vector_store_manager.embeddings.embed_query(query)
+
+            points = self._raw_search(query_vector, filter_criteria, max_results, min_score)
+            return [SearchResult.from_point(point) for point in points]
+
+        except Exception as e:
+            self.logger.error(f"Error during search: {e}")
+            raise
+
+    async def _search_async(self, query: str, query_vector: Optional[List[float]], max_results: int, min_score: float,
+                            filter_criteria: Optional[models.Filter] = None) -> List[SearchResult]:
+        """Async variant of _search: awaits the embedding and the Qdrant query instead of blocking a thread"""
+
+        if not self._initialized:
+            self.initialize()
 
         try:
-            documents_with_scores = self.vector_store_manager.similarity_search_with_score(
-                query=query,
-                k=max_results,
-                filter_criteria=filter_criteria
+            if query_vector is None:
+                query_vector = await self.vector_store_manager.embeddings.aembed_query(query)
+
+            response = await self.vector_store_manager.async_client.query_points(
+                collection_name=self.vector_store_manager.collection_name,
+                query=query_vector,
+                query_filter=filter_criteria,
+                limit=max_results,
+                score_threshold=min_score,
+                with_payload=True
             )
+            return [SearchResult.from_point(point) for point in response.points]
 
-            return [
-                SearchResult.from_documents(doc, score)
-                for doc, score in documents_with_scores
-                if score >= min_score
-            ]
-            
         except Exception as e:
             self.logger.error(f"Error during search: {e}")
-            return []
+            raise
 
-    def search_all_embeddings(self, query: str, max_results: int = 5, min_score: float = 0.0) -> List[SearchResult]:
-        """Perform semantic similarity search across all vector embeddings: no filtering"""
+    def search_batch(self, queries: List[str], dataset_ids: List[Optional[List[str]]], max_results: int = 5, min_score: float = 0.0,
+                     bounding_boxes: Optional[List[Optional[BoundingBox]]] = None) -> List[List[SearchResult]]:
+        """
+        Perform several semantic similarity searches in one round trip to the embeddings API and one to Qdrant.
+        dataset_ids holds, per query, the dataset ids to restrict the search to, or None to search all embeddings.
+        bounding_boxes optionally holds, per query, a bounding box to restrict the search to instead of dataset ids.
+        Returns one list of SearchResults per query, in input order.
+        """
 
         if not self._initialized:
             self.initialize()
 
-        self.logger.info(f"Searching all embeddings with min_score: {min_score}")
+        self.logger.info(f"Searching vector store with a batch of {len(queries)} queries, min_score: {min_score}")
 
         try:
-            documents_with_scores = self.vector_store_manager.similarity_search_with_score(
-                query=query,
-                k=max_results
-            )
-            return [
-                SearchResult.from_documents(doc, score)
-                for doc, score in documents_with_scores
-                if score >= min_score
+            bounding_boxes = bounding_boxes or [None] * len(queries)
+            filters = [
+                self._build_bbox_filter(bounding_box) if bounding_box
+                else self._build_dataset_id_filter(ids) if ids
+                else None
+                for ids, bounding_box in zip(dataset_ids, bounding_boxes)
             ]
-           
+            query_vectors = self.vector_store_manager.embeddings.embed_documents(queries)
+            batch_points = self._raw_search_batch(query_vectors, filters, max_results, min_score)
+            return [[SearchResult.from_point(point) for point in points] for points in batch_points]
+
         except Exception as e:
-            self.logger.error(f"Error during search: {e}")
-            return []
+            self.logger.error(f"Error during batch search: {e}")
+            raise
+
+    def _raw_search(self, query_vector: List[float], filter_criteria: Optional[models.Filter], k: int,
+                    min_score: float = 0.0) -> List[models.ScoredPoint]:
+        """Query Qdrant directly with a vector, bypassing the langchain vector store wrapper.
+           Points scoring below min_score are dropped by Qdrant itself."""
+        response = self.vector_store_manager.client.query_points(
+            collection_name=self.vector_store_manager.collection_name,
+            query=query_vector,
+            query_filter=filter_criteria,
+            limit=k,
+            score_threshold=min_score,
+            with_payload=True
+        )
+        return response.points
+
+    def _raw_search_batch(self, query_vectors: List[List[float]], filters: List[Optional[models.Filter]], k: int,
+                          min_score: float = 0.0) -> List[List[models.ScoredPoint]]:
+        """Run several vector queries against Qdrant in a single batch request"""
+        responses = self.vector_store_manager.client.query_batch_points(
+            collection_name=self.vector_store_manager.collection_name,
+            requests=[
+                models.QueryRequest(query=query_vector, filter=filter_criteria, limit=k, score_threshold=min_score, with_payload=True)
+                for query_vector, filter_criteria in zip(query_vectors, filters)
+            ]
+        )
+        return [response.points for response in responses]
 
     def _build_dataset_id_filter(self, dataset_ids: List[str]) -> models.Filter:
         """Build a Qdrant filter for specific dataset IDs.
-           Returns a Qdrant Filter object that matches any of the provided dataset IDs."""
-        
-        if len(dataset_ids) == 1:
-            return models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key='metadata.dataset_id',
-                        match=models.MatchValue(value=dataset_ids[0])
-                    )
-                ]
-            )
-        else:
-            conditions=[]
-            for dataset_id in dataset_ids:
-                conditions.append(
-                    models.FieldCondition(
-                        key='metadata.dataset_id',
-                        match=models.MatchValue(value=dataset_id)
-                    )
+           Returns a Qdrant Filter object with a single set-membership condition matching any of the provided dataset IDs.
+           Filters are cached per set of dataset IDs."""
+
+        cache_key = frozenset(dataset_ids)
+        with self._filter_cache_lock:
+            filter_criteria = self._filter_cache.get(cache_key)
+        if filter_criteria is not None:
+            return filter_criteria
+
+        filter_criteria = models.Filter(
+            must=[
+                models.FieldCondition(
+                    key='metadata.dataset_id',
+                    match=models.MatchAny(any=list(dataset_ids))
                 )
-            return models.Filter(should=conditions)
\ No newline at end of file
+            ]
+        )
+        with self._filter_cache_lock:
+            self._filter_cache[cache_key] = filter_criteria
+        return filter_criteria
+
+    @staticmethod
+    def _build_bbox_filter(bounding_box: BoundingBox) -> models.Filter:
+        """Build a Qdrant filter matching datasets whose extent envelope intersects the bounding box.
+           Two envelopes intersect when neither lies entirely west, east, south or north of the other,
+           which is four range conditions on the indexed bbox payload edges."""
+        return models.Filter(
+            must=[
+                models.FieldCondition(key=f"{BBOX_PAYLOAD_KEY}.west", range=models.Range(lte=bounding_box.east)),
+                models.FieldCondition(key=f"{BBOX_PAYLOAD_KEY}.east", range=models.Range(gte=bounding_box.west)),
+                models.FieldCondition(key=f"{BBOX_PAYLOAD_KEY}.south", range=models.Range(lte=bounding_box.north)),
+                models.FieldCondition(key=f"{BBOX_PAYLOAD_KEY}.north", range=models.Range(gte=bounding_box.south)),
+            ]
+        )
@@ -0,0 +1,81 @@
+import time
+import threading
+import logging
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# Minimum cosine similarity between two query embeddings to reuse a cached response
+SIMILARITY_THRESHOLD = 0.95
+# Maximum number of cached responses; the least recently used entry is evicted first
+MAX_ENTRIES = 1024
+# Seconds after which a cached response is no longer served
+TTL_SECONDS = 600
+
+
+class SemanticQueryCache:
+    """
+    In-memory cache of pipeline responses keyed by query embedding similarity.
+
+    Embeddings are stored L2-normalized in a preallocated matrix, so a lookup is a single
+    matrix-vector product over all entries. Entries expire after a TTL and the least recently
+    used entry is overwritten when the cache is full.
+    """
+
+    def __init__(self, similarity_threshold: float = SIMILARITY_THRESHOLD,
+                 max_entries: int = MAX_ENTRIES, ttl_seconds: float = TTL_SECONDS):
+        self.logger = logging.getLogger(__name__)
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._embeddings: Optional[np.ndarray] = None  # allocated on first insert, once the dimension is known
+        self._max_results = np.zeros(max_entries, dtype=np.int32)
+        self._created_at = np.full(max_entries, -np.inf)
+        self._last_used = np.full(max_entries, -np.inf)
+        self._responses: List[Optional[Dict[str, Any]]] = [None] * max_entries
+
+    def get(self, embedding: List[float], max_results: int) -> Optional[Dict[str, Any]]:
+        """Return the cached response of the most similar live query, or None on a miss."""
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._embeddings is None:
+                return None
+
+            similarities = self._embeddings @ query
+            live = (now - self._created_at < self.ttl_seconds) & (self._max_results == max_results)
+            similarities[~live] = -np.inf
+
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+
+            self._last_used[best] = now
+            self.logger.info(f"Semantic cache hit (similarity {similarities[best]:.3f})")
+            return self._responses[best]
+
+    def put(self, embedding: List[float], max_results: int, response: Dict[str, Any]) -> None:
+        """Cache a response, overwriting an expired or the least recently used entry."""
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            expired = now - self._created_at >= self.ttl_seconds
+            slot = int(np.argmax(expired)) if expired.any() else int(np.argmin(self._last_used))
+
+            self._embeddings[slot] = vector
+            self._max_results[slot] = max_results
+            self._created_at[slot] = now
+            self._last_used[slot] = now
+            self._responses[slot] = response
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
@@ -1,3 +1,5 @@
 from .qdrant_store import QdrantVectorStoreManager
+from .cached_embeddings import CachedEmbeddings
+from .response_cache import QdrantResponseCache
 
-__all__ = ['QdrantVectorStoreManager']
\ No newline at end of file
+__all__ = ['QdrantVectorStoreManager', 'CachedEmbeddings', 'QdrantResponseCache']
\ No newline at end of file
@@ -0,0 +1,61 @@
+import logging
+from threading import Lock
+from typing import List
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+# Number of text -> vector mappings kept in memory
+EMBEDDING_CACHE_SIZE = 1024
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings adapter that remembers recently embedded texts so repeated texts skip the embeddings API."""
+
+    def __init__(self, embeddings: Embeddings, maxsize: int = EMBEDDING_CACHE_SIZE):
+        self.embeddings = embeddings
+        self.logger = logging.getLogger(__name__)
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query text, reusing a cached vector when available."""
+        vector = self._lookup(text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._store(text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of embed_query."""
+        vector = self._lookup(text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            self._store(text, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str], **kwargs) -> List[List[float]]:
+        """Embed several texts, sending only the uncached ones to the wrapped embeddings in one call."""
+        vectors = [self._lookup(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.embeddings.embed_documents([texts[i] for i in missing], **kwargs)
+            for i, vector in zip(missing, embedded):
+                self._store(texts[i], vector)
+                vectors[i] = vector
+        return vectors
+
+    def _lookup(self, text: str):
+        with self._lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.logger.info(f"Embedding cache hit rate: {self.hits / (self.hits + self.misses):.1%}")
+            return vector
+
+    def _store(self, text: str, vector: List[float]) -> None:
+        with self._lock:
+            self._cache[text] = vector
@@ -1,12 +1,25 @@
 import os
+import uuid
 from typing import List, Optional, Dict, Any
 from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient, models
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
 from langchain.schema import Document
 from langchain_openai import OpenAIEmbeddings
 from dotenv import load_dotenv
 from models.dataset import Dataset
 
+# Number of texts sent per embeddings API request
+EMBEDDING_CHUNK_SIZE = 128
+# Number of points sent per Qdrant upload request
+UPLOAD_BATCH_SIZE = 256
+# Payload field holding the dataset id, indexed for filtered searches
+DATASET_ID_PAYLOAD_KEY = "metadata.dataset_id"
+# Payload field holding the dataset's spatial envelope, indexed so bounding box queries are answered by Qdrant
+BBOX_PAYLOAD_KEY = "bbox"
+BBOX_PAYLOAD_FIELDS = ("west", "south", "east", "north")
+# gRPC channel options for the async client; one connection multiplexes many concurrent searches
+GRPC_OPTIONS = {"grpc.max_concurrent_streams": 64}
+
 
 class QdrantVectorStoreManager:
     """Manages Qdrant vector store operations."""
@@ -15,16 +28,29 @@ class QdrantVectorStoreManager:
         load_dotenv()
         self.host = os.getenv("QDRANT_HOST")
         self.port = int(os.getenv("QDRANT_PORT"))
+        self.grpc_port = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
         self.collection_name = os.getenv("COLLECTION_NAME")
         self.client = None
+        self.async_client = None
         self.vector_store = None
         self.embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
 
     def initialize(self) -> None:
         """
-        Initialiaze Qdrant client and vector store.
+        Initialiaze Qdrant client and vector store. Subsequent calls reuse the existing client.
         """
+        if self.vector_store is not None:
+            return
+
         self.client = QdrantClient(host=self.host, port=self.port)
+        # async searches share one gRPC connection instead of a thread and socket per request
+        self.async_client = AsyncQdrantClient(
+            host=self.host,
+            port=self.port,
+            grpc_port=self.grpc_port,
+            prefer_grpc=True,
+            grpc_options=GRPC_OPTIONS
+        )
         self._ensure_collection_exists()
 
         self.vector_store = QdrantVectorStore(
@@ -36,12 +62,61 @@ class QdrantVectorStoreManager:
     def add_datasets(self, datasets: List[Dataset]) -> None:
         """
         Adds datasets to the vector store.
+
+        Callers pass whole batches; all texts are embedded with batched embedding requests
+        and the points are uploaded to Qdrant in bulk, using the same payload layout as the
+        langchain vector store so they remain searchable through it.
+
+        Point ids are derived from the dataset id, so re-harvesting a dataset replaces its point;
+        points indexed earlier under random ids are deleted.
         """
         if not self.vector_store:
             raise ValueError("Vector store is not initialized. Call initialize() first.")
         
         documents = self._datasets_to_documents(datasets)
-        self.vector_store.add_documents(documents)
+        vectors = self.embeddings.embed_documents(
+            [document.page_content for document in documents],
+            chunk_size=EMBEDDING_CHUNK_SIZE
+        )
+        points = [
+            models.PointStruct(
+                id=self._point_id(dataset),
+                vector=vector,
+                payload=self._point_payload(dataset, document)
+            )
+            for dataset, document, vector in zip(datasets, documents, vectors)
+        ]
+
+        dataset_ids = [dataset.dataset_id for dataset in datasets if dataset.dataset_id]
+        if dataset_ids:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(filter=models.Filter(
+                    must=[models.FieldCondition(key=DATASET_ID_PAYLOAD_KEY, match=models.MatchAny(any=dataset_ids))],
+                    must_not=[models.HasIdCondition(has_id=[point.id for point in points])]
+                ))
+            )
+        self.client.upload_points(
+            collection_name=self.collection_name,
+            points=points,
+            batch_size=UPLOAD_BATCH_SIZE
+        )
+
+    def has_bbox_payload(self) -> bool:
+        """
+        Checks that every point carries the bbox payload key, which is null for datasets without a
+        polygon extent. Points indexed before the payload was added lack the key until the datasets
+        are harvested again.
+        """
+        missing = self.client.count(
+            collection_name=self.collection_name,
+            count_filter=models.Filter(
+                must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=BBOX_PAYLOAD_KEY))],
+                must_not=[models.IsNullCondition(is_null=models.PayloadField(key=BBOX_PAYLOAD_KEY))]
+            ),
+            exact=True
+        ).count
+        return missing == 0
 
     def similarity_search(self, query: str, k:int = 3, filter_criteria: Optional[models.Filter] = None) -> List[Document]:
         """
@@ -87,6 +162,44 @@ class QdrantVectorStoreManager:
                 },
             )
 
+        # keyword index so dataset id filters are resolved from the index instead of scanning payloads
+        self.client.create_payload_index(
+            collection_name=self.collection_name,
+            field_name=DATASET_ID_PAYLOAD_KEY,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
+        # float indexes on the envelope edges so bounding box filters are resolved from the index
+        for edge in BBOX_PAYLOAD_FIELDS:
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=f"{BBOX_PAYLOAD_KEY}.{edge}",
+                field_schema=models.PayloadSchemaType.FLOAT,
+            )
+
+    def _point_payload(self, dataset: Dataset, document: Document) -> Dict[str, Any]:
+        """
+        Builds the payload of a dataset's point. Datasets with a polygon extent, the ones PostGIS
+        indexes, also carry their envelope so bounding box queries need no PostGIS round trip;
+        for all others the bbox is null.
+        """
+        payload = {
+            QdrantVectorStore.CONTENT_KEY: document.page_content,
+            QdrantVectorStore.METADATA_KEY: document.metadata,
+            BBOX_PAYLOAD_KEY: None,
+        }
+        geojson = dataset.spatial_extent_geojson
+        if geojson and geojson.get("type") == "Polygon" and dataset.spatial_extent_bounds:
+            payload[BBOX_PAYLOAD_KEY] = dict(zip(BBOX_PAYLOAD_FIELDS, dataset.spatial_extent_bounds))
+        return payload
+
+    @staticmethod
+    def _point_id(dataset: Dataset) -> str:
+        """Derives a stable point id from the dataset id; datasets without one get a random id."""
+        if dataset.dataset_id:
+            return str(uuid.uuid5(uuid.NAMESPACE_URL, dataset.dataset_id))
+        return str(uuid.uuid4())
+
     def _datasets_to_documents(self, datasets: List[Dataset]) -> List[Document]:
         """
         Converts a list of Dataset objects to a list of langchain Document objects.
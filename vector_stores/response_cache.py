@@ -0,0 +1,115 @@
+import time
+import uuid
+import logging
+from typing import List, Dict, Any, Optional
+from qdrant_client import QdrantClient, models
+
+# Qdrant collection holding cached pipeline responses, keyed by query embedding
+RESPONSE_CACHE_COLLECTION = "rag_cache"
+# Minimum cosine similarity between two query embeddings to reuse a cached response
+SIMILARITY_THRESHOLD = 0.95
+# Seconds a cached response stays valid
+TTL_SECONDS = 24 * 3600
+
+
+class QdrantResponseCache:
+    """
+    Persistent semantic cache of pipeline responses stored in a dedicated Qdrant collection.
+
+    Unlike the in-memory cache, entries survive restarts and are shared by every worker process.
+    Each point stores the response together with its expiry time and the ids of its source
+    datasets, so responses citing a changed dataset can be invalidated.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str = RESPONSE_CACHE_COLLECTION,
+                 similarity_threshold: float = SIMILARITY_THRESHOLD, ttl_seconds: float = TTL_SECONDS):
+        self.client = client
+        self.collection_name = collection_name
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._collection_ready = self.client.collection_exists(collection_name=self.collection_name)
+
+    def get(self, embedding: List[float], max_results: int) -> Optional[Dict[str, Any]]:
+        """Return the cached response of the most similar unexpired query, or None on a miss."""
+        if not self._collection_ready:
+            return None
+
+        response = self.client.query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            query_filter=models.Filter(must=[
+                models.FieldCondition(key="expires_at", range=models.Range(gt=time.time())),
+                models.FieldCondition(key="max_results", match=models.MatchValue(value=max_results)),
+            ]),
+            limit=1,
+            score_threshold=self.similarity_threshold,
+            with_payload=["answer", "source_datasets"]
+        )
+        if not response.points:
+            return None
+
+        point = response.points[0]
+        self.logger.info(f"Persistent response cache hit (similarity {point.score:.3f})")
+        return {"answer": point.payload["answer"], "source_datasets": point.payload["source_datasets"]}
+
+    def put(self, embedding: List[float], max_results: int, response: Dict[str, Any]) -> None:
+        """Store a response for the query embedding."""
+        if not self._collection_ready:
+            self._create_collection(len(embedding))
+
+        source_datasets = response.get("source_datasets", [])
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[models.PointStruct(
+                id=str(uuid.uuid4()),
+                vector=embedding,
+                payload={
+                    "answer": response.get("answer", ""),
+                    "source_datasets": source_datasets,
+                    "source_dataset_ids": [dataset.get("dataset_id") for dataset in source_datasets],
+                    "max_results": max_results,
+                    "expires_at": time.time() + self.ttl_seconds,
+                }
+            )],
+            wait=False
+        )
+
+    def invalidate(self, dataset_ids: List[str]) -> None:
+        """Delete cached responses that cite any of the given datasets."""
+        if not self._collection_ready or not dataset_ids:
+            return
+
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="source_dataset_ids", match=models.MatchAny(any=list(dataset_ids)))
+            ]))
+        )
+
+    def purge_expired(self) -> None:
+        """Delete responses whose TTL has passed."""
+        if not self._collection_ready:
+            return
+
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="expires_at", range=models.Range(lte=time.time()))
+            ]))
+        )
+
+    def _create_collection(self, vector_size: int) -> None:
+        """Create the cache collection and the payload indexes used by its filters."""
+        if not self.client.collection_exists(collection_name=self.collection_name):
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config={
+                    "size": vector_size,
+                    "distance": "Cosine",
+                },
+            )
+            self.client.create_payload_index(self.collection_name, "expires_at", models.PayloadSchemaType.FLOAT)
+            self.client.create_payload_index(self.collection_name, "max_results", models.PayloadSchemaType.INTEGER)
+            self.client.create_payload_index(self.collection_name, "source_dataset_ids", models.PayloadSchemaType.KEYWORD)
+        self._collection_ready = True